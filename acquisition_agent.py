@@ -1,15 +1,46 @@
 import json
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import logging
 
+# Try to import optional dependencies for faster HTML parsing
+try:
+    from selectolax.parser import HTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+try:
+    import lxml  # noqa: F401 - only needed as a BeautifulSoup backend
+    BS4_PARSER = 'lxml'
+except ImportError:
+    BS4_PARSER = 'html.parser'
+
 # --- Configuration ---
 TARGETS_FILE = 'targets.json'
 DATA_DIR = 'data'
 REPOS_DIR = os.path.join(DATA_DIR, 'repos')
 SCRAPED_DIR = os.path.join(DATA_DIR, 'scraped')
+# Heuristic to find main content. This may need tuning per site.
+CONTENT_SELECTORS = ['main', '[role="main"]', '#content', '#main-content', '.main-content']
+REQUEST_TIMEOUT = 30  # seconds
+GIT_WORKERS = 4  # Concurrent git clones (each runs as its own git process)
+SCRAPE_WORKERS = 16  # Concurrent page fetches (share the session's connection pool)
+
+# --- Shared HTTP session (keep-alive across scrapes on the same host) ---
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+)
+_SESSION.mount('https://', _adapter)
+_SESSION.mount('http://', _adapter)
+_SESSION.headers.update({'User-Agent': 'Mozilla/5.0', 'Accept-Encoding': 'gzip, deflate'})
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -17,7 +48,8 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 def ensure_dir_exists(path):
     """Ensure that a directory exists, creating it if necessary."""
     if not os.path.exists(path):
-        os.makedirs(path)
+        # exist_ok: parallel targets may create the same parent concurrently
+        os.makedirs(path, exist_ok=True)
         logging.info(f"Created directory: {path}")
 
 def handle_git_target(target):
@@ -46,36 +78,21 @@ def handle_git_target(target):
 
     try:
         if sparse_checkout_paths:
+            if not isinstance(sparse_checkout_paths, list):
+                sparse_checkout_paths = [sparse_checkout_paths]
             logging.info(f"Performing sparse checkout for paths: {sparse_checkout_paths}")
-            # 1. Init a bare repo
-            subprocess.run(['git', 'init', '--bare', destination_path], check=True)
-            # 2. Add remote
-            subprocess.run(['git', '-C', destination_path, 'remote', 'add', 'origin', repo_url], check=True)
-            # 3. Enable sparse checkout
-            subprocess.run(['git', '-C', destination_path, 'config', 'core.sparsecheckout', 'true'], check=True)
-            # 4. Define sparse checkout paths
-            sparse_checkout_file = os.path.join(destination_path, '.git', 'info', 'sparse-checkout')
-            with open(sparse_checkout_file, 'w') as f:
-                if isinstance(sparse_checkout_paths, list):
-                    for path in sparse_checkout_paths:
-                        f.write(f"{path}\n")
-                else:
-                    f.write(f"{sparse_checkout_paths}\n")
-            # 5. Fetch and pull the default branch
-            logging.info("Fetching from remote...")
-            subprocess.run(['git', '-C', destination_path, 'fetch', 'origin', 'master'], check=True) # Try master
-            subprocess.run(['git', '-C', destination_path, 'fetch', 'origin', 'main'], check=True) # Try main
+            # Partial clone: fetch trees only, blobs are pulled lazily for the
+            # checked-out paths. HEAD resolves the default branch (main or master).
+            subprocess.run(['git', 'clone', '--filter=blob:none', '--sparse', '--depth=1',
+                            repo_url, destination_path], check=True)
             logging.info("Pulling sparse data...")
-            # Attempt to checkout main, fallback to master
-            try:
-                subprocess.run(['git', '-C', destination_path, 'checkout', 'main'], check=True)
-            except subprocess.CalledProcessError:
-                logging.warning("Could not checkout 'main', trying 'master'.")
-                subprocess.run(['git', '-C', destination_path, 'checkout', 'master'], check=True)
+            subprocess.run(['git', '-C', destination_path, 'sparse-checkout', 'set', '--cone',
+                            *sparse_checkout_paths], check=True)
 
         else:
-            logging.info(f"Performing a full clone for '{target['name']}'...")
-            subprocess.run(['git', 'clone', '--depth', '1', repo_url, destination_path], check=True)
+            logging.info(f"Performing a partial clone for '{target['name']}'...")
+            subprocess.run(['git', 'clone', '--filter=blob:none', '--depth=1', '--single-branch',
+                            repo_url, destination_path], check=True)
         
         logging.info(f"Successfully cloned '{target['name']}' to '{destination_path}'")
 
@@ -85,6 +102,21 @@ def handle_git_target(target):
         logging.error(f"An unexpected error occurred for git target '{target['name']}': {e}")
 
 
+def extract_main_text(html):
+    """
+    Extracts the main content text from raw HTML bytes.
+    Uses selectolax (C parser) when installed, otherwise BeautifulSoup.
+    """
+    if HAS_SELECTOLAX:
+        tree = HTMLParser(html)
+        content = next((node for node in map(tree.css_first, CONTENT_SELECTORS) if node is not None), tree.body)
+        return content.text(separator='\n', strip=True)
+
+    soup = BeautifulSoup(html, BS4_PARSER)
+    content = next((node for node in map(soup.select_one, CONTENT_SELECTORS) if node), soup.body)
+    return content.get_text(separator='\n', strip=True)
+
+
 def handle_web_scrape_target(target):
     """
     Performs a basic web scrape of a single page.
@@ -102,23 +134,11 @@ def handle_web_scrape_target(target):
     ensure_dir_exists(destination_dir)
     
     try:
-        response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
+        response = _SESSION.get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Heuristic to find main content. This may need tuning per site.
-        content_selectors = ['main', '[role="main"]', '#content', '#main-content', '.main-content']
-        content = None
-        for selector in content_selectors:
-            content = soup.select_one(selector)
-            if content:
-                break
-        
-        if not content:
-            content = soup.body
-
-        text = content.get_text(separator='\n', strip=True)
+        # Pass raw bytes: the parsers sniff the encoding themselves
+        text = extract_main_text(response.content)
         
         # Use the last part of the URL path as a filename if it's not a root path
         filename = os.path.basename(url.rstrip('/')) + '.md'
@@ -155,14 +175,20 @@ def main():
     ensure_dir_exists(REPOS_DIR)
     ensure_dir_exists(SCRAPED_DIR)
 
+    git_targets = [t for t in targets if t.get('type') == 'git']
+    web_targets = [t for t in targets if t.get('type') == 'web_scrape']
     for target in targets:
-        if target.get('type') == 'git':
-            handle_git_target(target)
-        elif target.get('type') == 'web_scrape':
-            handle_web_scrape_target(target)
-        else:
+        if target.get('type') not in ('git', 'web_scrape'):
             logging.warning(f"Unknown target type: {target.get('type')} for target '{target['name']}'")
-        logging.info("-" * 20)
+
+    # Clones and scrapes are independent: run both streams side by side.
+    # Each handler logs and swallows its own errors.
+    with ThreadPoolExecutor(max_workers=GIT_WORKERS) as git_pool, \
+            ThreadPoolExecutor(max_workers=SCRAPE_WORKERS) as scrape_pool:
+        git_results = git_pool.map(handle_git_target, git_targets)
+        scrape_results = scrape_pool.map(handle_web_scrape_target, web_targets)
+        list(git_results)
+        list(scrape_results)
 
     logging.info("--- Acquisition Agent Finished ---")
 
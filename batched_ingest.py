@@ -4,12 +4,17 @@ Batched Ingestion Script for RAG Knowledge Base
 Processes sources in smaller batches to avoid connection timeouts
 """
 
+import asyncio
+import functools
+import hashlib
+import itertools
 import json
 import os
+import sqlite3
 import sys
 from pathlib import Path
-import time
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterator, Optional, Tuple
 import argparse
 
 # Add parent directory for imports
@@ -19,6 +24,14 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from sentence_transformers import SentenceTransformer
 import chromadb
 import logging
+import numpy as np
+
+# Try to import optional dependencies for better performance
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 # Configuration
 CHROMA_HOST = "localhost"
@@ -29,6 +42,29 @@ CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 150
 DATA_DIR = Path("data")
 BATCH_SIZE = 100  # Chunks per batch
+EMBED_BATCH_SIZE = {"cuda": 128, "mps": 64, "cpu": 32}  # Sentences per encode() forward pass
+EMBED_DEVICE = os.getenv("RAG_EMBED_DEVICE")  # Force "cpu"/"cuda"/"mps"; auto-detect if unset
+EMBED_FP16 = os.getenv("RAG_EMBED_FP16", "1") == "1"  # Half-precision encode on CUDA/ROCm
+FP16_MAX_COSINE_DRIFT = 1e-3  # Revert to fp32 if half precision moves vectors more than this
+EMBED_CPU_BACKEND = os.getenv("RAG_EMBED_CPU_BACKEND", "onnx")  # "onnx" (ONNX Runtime) or "torch"
+# fp32 export by default so stored vectors match torch-encoded queries; set to e.g.
+# onnx/model_qint8_avx512_vnni.onnx for int8 (faster, slightly different vectors)
+EMBED_ONNX_FILE = os.getenv("RAG_EMBED_ONNX_FILE", "onnx/model.onnx")
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # File reads are I/O bound (GIL released)
+READ_SLICE_SIZE = 5000  # Files submitted to the reader pool at a time
+FLUSH_SIZE = 2000  # Chunks embedded + stored per flush (bounds resident memory)
+SOURCE_EXTENSIONS = frozenset({'.md', '.py', '.js', '.ts', '.json', '.txt', '.html', '.css'})
+MAX_CONCURRENT_WRITES = 4  # In-flight collection.add requests
+STATE_DB_PATH = Path(os.getenv("RAG_INGEST_STATE_DB", ".ingest_state.db"))  # Local processed-file state
+# HNSW settings applied when the collection is created (tuned for bulk ingest)
+HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 100,
+    "hnsw:M": 16,
+    "hnsw:num_threads": max(4, os.cpu_count() or 1),
+    "hnsw:sync_threshold": 20000,
+    "hnsw:batch_size": 1000,
+}
 
 # Setup logging
 logging.basicConfig(
@@ -38,12 +74,49 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1)
+def _load_targets() -> List[Dict]:
+    """Parse targets.json once per process (shared by every pipeline and the CLI)"""
+    raw = Path('targets.json').read_bytes()
+    return orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+
+
+def _file_sha256(file_path: Path) -> str:
+    """Content hash used to confirm a file really changed"""
+    return hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+
+def _read_document(file_path: Path) -> Optional[Dict]:
+    """Read one source file; returns None for unreadable or empty files"""
+    try:
+        raw = file_path.read_bytes()
+        mtime = file_path.stat().st_mtime
+    except Exception as e:
+        logger.warning(f"Could not read {file_path}: {e}")
+        return None
+    content = raw.decode('utf-8', errors='ignore')
+    if not content.strip():
+        return None
+    return {
+        'content': content,
+        'path': str(file_path.absolute()),
+        'name': file_path.name,
+        'mtime': mtime,
+        'sha256': hashlib.sha256(raw).hexdigest()
+    }
+
+
 class BatchedIngestionPipeline:
-    def __init__(self, source_names: List[str] = None):
+    def __init__(self, source_names: List[str] = None, recreate_collection: bool = False):
         self.source_names = source_names
+        self.recreate_collection = recreate_collection
         self.chroma_client = None
         self.collection = None
         self.embeddings = None
+        self.device = "cpu"
+        self._write_semaphore = None
+        self._failed_files = set()
+        self.state_db = None
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=CHUNK_SIZE,
             chunk_overlap=CHUNK_OVERLAP,
@@ -54,55 +127,193 @@ class BatchedIngestionPipeline:
 
     def _load_targets_map(self):
         """Load targets.json to map source names to metadata"""
-        with open('targets.json', 'r') as f:
-            targets = json.load(f)
-            for target in targets:
-                self.targets_map[target['name']] = {
-                    'url': target.get('url', ''),
-                    'type': target.get('type', ''),
-                    'destination': target.get('destination', '')
-                }
+        for target in _load_targets():
+            self.targets_map[target['name']] = {
+                'url': target.get('url', ''),
+                'type': target.get('type', ''),
+                'destination': target.get('destination', '')
+            }
         logger.info(f"Loaded {len(self.targets_map)} target mappings")
 
-    def initialize(self):
+    @staticmethod
+    def _detect_device() -> str:
+        """Pick the embedding device: RAG_EMBED_DEVICE override, then CUDA/ROCm, MPS, CPU"""
+        if EMBED_DEVICE:
+            return EMBED_DEVICE
+        try:
+            import torch
+            if torch.cuda.is_available():
+                return "cuda"
+            if torch.backends.mps.is_available():
+                return "mps"
+        except Exception:
+            pass
+        return "cpu"
+
+    async def initialize(self):
         """Initialize ChromaDB connection and embeddings"""
         logger.info("Initializing Batched Ingestion Pipeline...")
 
-        # Initialize embeddings
-        self.embeddings = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        self._open_state_db()
+
+        # Initialize embeddings on the fastest available device
+        self.device = self._detect_device()
+        self.embeddings = self._load_embedding_model()
+        if self.device == "cuda" and EMBED_FP16:
+            self._enable_half_precision()
 
-        # Connect to ChromaDB
-        self.chroma_client = chromadb.HttpClient(
+        # Connect to ChromaDB (async client so batch writes can overlap)
+        self.chroma_client = await chromadb.AsyncHttpClient(
             host=CHROMA_HOST,
             port=CHROMA_PORT
         )
 
-        # Get or create collection
-        self.collection = self.chroma_client.get_or_create_collection(
-            name=COLLECTION_NAME
+        if self.recreate_collection:
+            await self._drop_collection()
+
+        # Get or create collection (HNSW metadata only applies on creation)
+        self.collection = await self.chroma_client.get_or_create_collection(
+            name=COLLECTION_NAME,
+            metadata=HNSW_METADATA
         )
+        if "hnsw:num_threads" not in (self.collection.metadata or {}):
+            logger.warning(
+                f"Collection '{COLLECTION_NAME}' predates the bulk-ingest HNSW settings; "
+                "run once with --recreate-collection to migrate"
+            )
+        self._write_semaphore = asyncio.Semaphore(MAX_CONCURRENT_WRITES)
 
         logger.info("Successfully connected to ChromaDB server.")
         logger.info("Initialization complete.")
 
-    def get_processed_sources(self) -> set:
-        """Get list of already processed source files"""
+    def _load_embedding_model(self) -> SentenceTransformer:
+        """Load the embedding model; CPU runs use ONNX Runtime when available"""
+        if self.device == "cpu" and EMBED_CPU_BACKEND == "onnx":
+            try:
+                model = SentenceTransformer(
+                    EMBEDDING_MODEL_NAME,
+                    device="cpu",
+                    backend="onnx",
+                    model_kwargs={"provider": "CPUExecutionProvider", "file_name": EMBED_ONNX_FILE}
+                )
+                logger.info(f"Embedding model loaded: {EMBEDDING_MODEL_NAME} (cpu, onnx: {EMBED_ONNX_FILE})")
+                return model
+            except Exception as e:
+                logger.warning(f"ONNX backend unavailable, using torch on CPU: {e}")
+
+        model = SentenceTransformer(EMBEDDING_MODEL_NAME, device=self.device)
+        logger.info(f"Embedding model loaded: {EMBEDDING_MODEL_NAME} ({self.device})")
+        return model
+
+    async def _drop_collection(self):
+        """Delete the collection and local ingestion state so every source re-ingests"""
+        logger.warning(f"Recreating collection '{COLLECTION_NAME}': all sources must be re-ingested")
         try:
-            results = self.collection.get()
+            await self.chroma_client.delete_collection(name=COLLECTION_NAME)
+        except Exception as e:
+            logger.warning(f"Could not delete collection '{COLLECTION_NAME}': {e}")
+        self.state_db.execute("DELETE FROM processed")
+        # ingest.py keeps its own state in the same file; dropping its tables makes it
+        # rebuild them from the new collection on its next run
+        self.state_db.execute("DROP TABLE IF EXISTS ingested_sources")
+        self.state_db.execute("DROP TABLE IF EXISTS chunks")
+        self.state_db.commit()
+
+    def _enable_half_precision(self):
+        """Cast the model to fp16, keeping it only if embeddings stay within tolerance"""
+        probe = [
+            "How do I use React hooks for state management?",
+            "def read_file(path):\n    with open(path) as f:\n        return f.read()",
+        ]
+        reference = self.embeddings.encode(probe, convert_to_numpy=True, normalize_embeddings=True)
+        self.embeddings.half()
+        half = self.embeddings.encode(probe, convert_to_numpy=True, normalize_embeddings=True)
+
+        drift = float(np.max(1.0 - np.sum(reference * half.astype(np.float32), axis=1)))
+        if drift > FP16_MAX_COSINE_DRIFT:
+            self.embeddings.float()
+            logger.warning(f"fp16 cosine drift {drift:.2e} exceeds {FP16_MAX_COSINE_DRIFT}; using fp32")
+        else:
+            logger.info(f"Using fp16 embeddings (cosine drift {drift:.2e})")
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in length-sorted order so each mini-batch pads to similar lengths
+
+        Identical texts (license headers, copied READMEs, generated files) are
+        encoded once and their vector reused for every occurrence.
+        """
+        positions = {}
+        inverse = np.fromiter(
+            (positions.setdefault(t, len(positions)) for t in texts),
+            dtype=np.intp, count=len(texts)
+        )
+        unique_texts = list(positions)
+        if len(unique_texts) < len(texts):
+            logger.debug(f"Skipping {len(texts) - len(unique_texts)} duplicate chunks")
+
+        order = np.argsort([len(t) for t in unique_texts], kind='stable')
+        sorted_embeddings = self.embeddings.encode(
+            [unique_texts[i] for i in order],
+            batch_size=EMBED_BATCH_SIZE.get(self.device, 32),
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        # Scatter back to the original chunk order
+        embeddings = np.empty_like(sorted_embeddings)
+        embeddings[order] = sorted_embeddings
+        return embeddings[inverse]
+
+    def _open_state_db(self):
+        """Open the local SQLite table recording which files have been ingested"""
+        self.state_db = sqlite3.connect(STATE_DB_PATH)
+        self.state_db.execute("PRAGMA journal_mode=WAL")
+        self.state_db.execute("PRAGMA synchronous=NORMAL")
+        self.state_db.execute(
+            "CREATE TABLE IF NOT EXISTS processed "
+            "(path TEXT PRIMARY KEY, source TEXT, mtime REAL, sha256 TEXT)"
+        )
+        self.state_db.execute("CREATE INDEX IF NOT EXISTS processed_source ON processed(source)")
+        self.state_db.commit()
+        logger.info(f"Using ingestion state: {STATE_DB_PATH}")
+
+    def _mark_processed(self, source_name: str, files: List[Tuple[str, Optional[float], Optional[str]]]):
+        """Record (path, mtime, sha256) rows as ingested for a source"""
+        self.state_db.executemany(
+            "INSERT OR REPLACE INTO processed (path, source, mtime, sha256) VALUES (?, ?, ?, ?)",
+            [(path, source_name, mtime, sha256) for path, mtime, sha256 in files]
+        )
+        self.state_db.commit()
+
+    async def get_processed_sources(self, source_name: str) -> Dict[str, Tuple[Optional[float], Optional[str]]]:
+        """Get already processed files for one source as {path: (mtime, sha256)}"""
+        rows = self.state_db.execute(
+            "SELECT path, mtime, sha256 FROM processed WHERE source = ?", (source_name,)
+        ).fetchall()
+        if rows:
+            logger.info(f"Found {len(rows)} processed files for '{source_name}' in local state.")
+            return {path: (mtime, sha256) for path, mtime, sha256 in rows}
+
+        # No local state yet (source ingested before the state DB existed): seed it from ChromaDB
+        try:
+            results = await self.collection.get(
+                where={"technology": source_name},
+                include=["metadatas"]
+            )
             processed = set()
             for metadata in results['metadatas']:
                 if 'source_file' in metadata:
                     processed.add(metadata['source_file'])
-            logger.info(f"Found {len(processed)} existing sources in database.")
-            return processed
+            logger.info(f"Found {len(processed)} existing files for '{source_name}' in database.")
+            self._mark_processed(source_name, [(path, None, None) for path in processed])
+            return dict.fromkeys(processed, (None, None))
         except Exception as e:
             logger.warning(f"Could not fetch existing sources: {e}")
-            return set()
+            return {}
 
     def get_source_files(self, source_name: str) -> List[Path]:
         """Get all files for a specific source"""
         files = []
-        extensions = ['.md', '.py', '.js', '.ts', '.json', '.txt', '.html', '.css']
 
         # Find source directory
         source_info = self.targets_map.get(source_name)
@@ -117,14 +328,90 @@ class BatchedIngestionPipeline:
             logger.warning(f"Source path does not exist: {source_path}")
             return files
 
-        # Collect files
-        for ext in extensions:
-            files.extend(source_path.rglob(f'*{ext}'))
+        # Collect files in a single tree walk
+        for root, _, filenames in os.walk(source_path):
+            for filename in filenames:
+                if os.path.splitext(filename)[1] in SOURCE_EXTENSIONS:
+                    files.append(Path(root) / filename)
 
         logger.info(f"Found {len(files)} files for source '{source_name}'")
         return files
 
-    def process_source(self, source_name: str) -> int:
+    def _load_documents(self, files: List[Path]) -> Iterator[Dict]:
+        """Yield readable documents, overlapping file I/O across a thread pool"""
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+            for start in range(0, len(files), READ_SLICE_SIZE):
+                file_slice = files[start:start + READ_SLICE_SIZE]
+                for doc in executor.map(_read_document, file_slice):
+                    if doc:
+                        yield doc
+
+    def _chunk_stream(self, source_name: str, files: List[Path],
+                      loaded: List[Tuple[str, float, str]]) -> Iterator[Dict]:
+        """Yield chunks with metadata, splitting one document at a time
+
+        Each loaded file's (path, mtime, sha256) is appended to `loaded`.
+        """
+        source_url = self.targets_map[source_name].get('url', '')
+        for doc in self._load_documents(files):
+            loaded.append((doc['path'], doc['mtime'], doc['sha256']))
+            # Ids are stable per file so re-ingesting a changed file replaces its chunks
+            file_id = hashlib.sha1(doc['path'].encode('utf-8')).hexdigest()[:12]
+            chunks = self.text_splitter.split_text(doc['content'])
+            for i, chunk in enumerate(chunks):
+                yield {
+                    'id': f"{source_name}_{file_id}_{i}",
+                    'text': chunk,
+                    'metadata': {
+                        'technology': source_name,
+                        'source_url': source_url,
+                        'source_file': doc['path'],
+                        'chunk_index': i
+                    }
+                }
+
+    async def _add_batch(self, texts: List[str], embeddings: np.ndarray,
+                         metadatas: List[Dict], ids: List[str]) -> int:
+        """Store one batch in ChromaDB; returns chunks stored"""
+        async with self._write_semaphore:
+            try:
+                await self.collection.add(
+                    documents=texts,
+                    embeddings=embeddings.tolist(),
+                    metadatas=metadatas,
+                    ids=ids
+                )
+                return len(ids)
+            except Exception as e:
+                logger.error(f"Failed to store batch starting at {ids[0]}: {e}")
+                self._failed_files.update(m['source_file'] for m in metadatas)
+                return 0
+
+    async def _flush(self, chunks: List[Dict]) -> List[asyncio.Task]:
+        """Embed a buffer of chunks and schedule its ChromaDB writes"""
+        # Encode off the event loop so earlier writes keep progressing
+        embeddings = await asyncio.to_thread(self._encode, [c['text'] for c in chunks])
+
+        tasks = []
+        for i in range(0, len(chunks), BATCH_SIZE):
+            batch = chunks[i:i + BATCH_SIZE]
+            tasks.append(asyncio.create_task(self._add_batch(
+                texts=[c['text'] for c in batch],
+                embeddings=embeddings[i:i + BATCH_SIZE],
+                metadatas=[c['metadata'] for c in batch],
+                ids=[c['id'] for c in batch]
+            )))
+        return tasks
+
+    async def _drain(self, tasks: List[asyncio.Task]) -> int:
+        """Wait for scheduled writes; returns chunks stored"""
+        if not tasks:
+            return 0
+        stored = sum(await asyncio.gather(*tasks))
+        logger.info(f"Stored {stored} chunks (embedded on {self.device})")
+        return stored
+
+    async def process_source(self, source_name: str) -> int:
         """Process a single source"""
         logger.info(f"\n{'='*60}")
         logger.info(f"Processing source: {source_name}")
@@ -137,87 +424,76 @@ class BatchedIngestionPipeline:
             return 0
 
         # Get already processed files
-        processed_files = self.get_processed_sources()
-
-        # Filter new files
-        new_files = [f for f in files if str(f.absolute()) not in processed_files]
-        logger.info(f"New files to process: {len(new_files)}/{len(files)}")
+        processed_files = await self.get_processed_sources(source_name)
+
+        # Filter new and changed files
+        new_files = []
+        changed_files = []
+        touched_files = []
+        for f in files:
+            path = str(f.absolute())
+            state = processed_files.get(path)
+            if state is None:
+                new_files.append(f)
+                continue
+            mtime, sha256 = state
+            current_mtime = f.stat().st_mtime
+            if mtime is None or current_mtime == mtime:
+                continue
+            # mtime moved; only re-ingest if the content actually differs
+            if _file_sha256(f) == sha256:
+                touched_files.append((path, current_mtime, sha256))
+            else:
+                changed_files.append(f)
+
+        if touched_files:
+            self._mark_processed(source_name, touched_files)
+        for f in changed_files:
+            await self.collection.delete(where={"source_file": str(f.absolute())})
+        new_files.extend(changed_files)
+        logger.info(f"New files to process: {len(new_files)}/{len(files)} ({len(changed_files)} changed)")
 
         if not new_files:
             logger.info(f"All files already processed for '{source_name}'")
             return 0
 
-        # Load documents
-        documents = []
-        for file_path in new_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    if content.strip():
-                        documents.append({
-                            'content': content,
-                            'path': str(file_path.absolute()),
-                            'name': file_path.name
-                        })
-            except Exception as e:
-                logger.warning(f"Could not read {file_path}: {e}")
-
-        logger.info(f"Loaded {len(documents)} documents")
-
-        if not documents:
-            return 0
-
-        # Split into chunks
-        all_chunks = []
-        for doc in documents:
-            chunks = self.text_splitter.split_text(doc['content'])
-            for i, chunk in enumerate(chunks):
-                all_chunks.append({
-                    'text': chunk,
-                    'metadata': {
-                        'technology': source_name,
-                        'source_url': self.targets_map[source_name].get('url', ''),
-                        'source_file': doc['path'],
-                        'chunk_index': i
-                    }
-                })
-
-        logger.info(f"Created {len(all_chunks)} chunks")
-
-        # Embed and store in batches
+        # Stream files -> chunks -> embeddings -> ChromaDB, holding at most
+        # FLUSH_SIZE chunks in memory at a time. Reading, splitting and encoding
+        # run on worker threads, so writes for one flush run on the event loop
+        # while the next flush is read and embedded.
+        total_chunks = 0
         total_stored = 0
-        for i in range(0, len(all_chunks), BATCH_SIZE):
-            batch = all_chunks[i:i + BATCH_SIZE]
-
-            try:
-                # Prepare batch data
-                texts = [c['text'] for c in batch]
-                metadatas = [c['metadata'] for c in batch]
-                ids = [f"{source_name}_{i+j}" for j in range(len(batch))]
-
-                # Add to ChromaDB
-                self.collection.add(
-                    documents=texts,
-                    metadatas=metadatas,
-                    ids=ids
-                )
-
-                total_stored += len(batch)
-                logger.info(f"Stored batch {i//BATCH_SIZE + 1}/{(len(all_chunks)-1)//BATCH_SIZE + 1}: {len(batch)} chunks")
+        pending = []
+        loaded_files = []
+        self._failed_files = set()
+        stream = self._chunk_stream(source_name, new_files, loaded_files)
+        while True:
+            buffer = await asyncio.to_thread(lambda: list(itertools.islice(stream, FLUSH_SIZE)))
+            if not buffer:
+                break
+            tasks = await self._flush(buffer)
+            total_stored += await self._drain(pending)
+            pending = tasks
+            total_chunks += len(buffer)
+        total_stored += await self._drain(pending)
+
+        # Record fully stored files so the next run can skip them
+        self._mark_processed(
+            source_name,
+            [f for f in loaded_files if f[0] not in self._failed_files]
+        )
 
-                # Small delay to avoid overwhelming the server
-                time.sleep(0.1)
-
-            except Exception as e:
-                logger.error(f"Failed to store batch starting at {i}: {e}")
-                continue
+        logger.info(f"Created {total_chunks} chunks")
 
         logger.info(f"✓ Completed '{source_name}': {total_stored} chunks stored")
         return total_stored
 
     def run(self):
         """Run batched ingestion"""
-        self.initialize()
+        asyncio.run(self._run())
+
+    async def _run(self):
+        await self.initialize()
 
         if not self.source_names:
             logger.error("No sources specified")
@@ -235,7 +511,7 @@ class BatchedIngestionPipeline:
             logger.info(f"\n[{idx}/{len(self.source_names)}] Processing: {source_name}")
 
             try:
-                chunks_stored = self.process_source(source_name)
+                chunks_stored = await self.process_source(source_name)
                 total_chunks += chunks_stored
                 successful += 1
             except Exception as e:
@@ -256,9 +532,7 @@ class BatchedIngestionPipeline:
 
 def get_all_source_names() -> List[str]:
     """Get all source names from targets.json"""
-    with open('targets.json', 'r') as f:
-        targets = json.load(f)
-        return [t['name'] for t in targets]
+    return [t['name'] for t in _load_targets()]
 
 
 def main():
@@ -278,6 +552,12 @@ def main():
         action='store_true',
         help='List all available sources'
     )
+    parser.add_argument(
+        '--recreate-collection',
+        action='store_true',
+        help='Drop and recreate the collection with bulk-ingest HNSW settings '
+             '(one-time migration; re-run every batch afterwards)'
+    )
 
     args = parser.parse_args()
 
@@ -312,7 +592,10 @@ def main():
         return
 
     # Run ingestion
-    pipeline = BatchedIngestionPipeline(source_names=sources_to_process)
+    pipeline = BatchedIngestionPipeline(
+        source_names=sources_to_process,
+        recreate_collection=args.recreate_collection
+    )
     pipeline.run()
 
 
@@ -3,22 +3,62 @@
 Benchmark GPU vs CPU performance for RAG system
 """
 
+import functools
 import time
 import chromadb
 from sentence_transformers import SentenceTransformer
 import torch
 import statistics
 
-def benchmark_embeddings(device='cpu', num_queries=10):
+MODEL_NAME = 'all-MiniLM-L6-v2'
+WARMUP_BATCH_SIZE = 32  # encode() default batch size; warm a full batch so kernels are autotuned
+
+
+@functools.lru_cache(maxsize=None)
+def _load_model(device='cpu', backend='torch'):
+    """Load the embedding model once per device/backend and keep it resident"""
+    if backend == 'onnx':
+        return SentenceTransformer(MODEL_NAME, device='cpu', backend='onnx',
+                                   model_kwargs={'provider': 'CPUExecutionProvider'})
+    model = SentenceTransformer(MODEL_NAME)
+    if device == 'gpu' and torch.cuda.is_available():
+        model = model.to('cuda')
+    return model
+
+
+def _sync(device):
+    """Wait for queued GPU work so timestamps bracket the actual compute"""
+    if device == 'gpu' and torch.cuda.is_available():
+        torch.cuda.synchronize()
+
+
+def _elapsed(device, start_ns):
+    """Seconds since start_ns, after draining the GPU queue"""
+    _sync(device)
+    return (time.perf_counter_ns() - start_ns) / 1e9
+
+
+def _p95(times):
+    """95th percentile of the samples"""
+    return statistics.quantiles(times, n=100)[94] if len(times) > 1 else times[0]
+
+
+def _warmup(model, sentences):
+    """Run a full batch through the model before timing"""
+    repeats = -(-WARMUP_BATCH_SIZE // len(sentences))
+    _ = model.encode((sentences * repeats)[:WARMUP_BATCH_SIZE],
+                     batch_size=WARMUP_BATCH_SIZE, show_progress_bar=False)
+
+
+def benchmark_embeddings(device='cpu', num_queries=10, backend='torch'):
     """Benchmark embedding generation speed"""
     print(f"\n{'='*70}")
-    print(f"Benchmarking on: {device.upper()}")
+    print(f"Benchmarking on: {device.upper()} ({backend})")
     print(f"{'='*70}")
 
     # Load model
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+    model = _load_model(device, backend)
     if device == 'gpu' and torch.cuda.is_available():
-        model = model.to('cuda')
         print(f"GPU: {torch.cuda.get_device_name(0)}")
     else:
         print("Using CPU")
@@ -41,14 +81,15 @@ def benchmark_embeddings(device='cpu', num_queries=10):
 
     # Warmup
     print("\nWarming up...")
-    _ = model.encode(test_queries[:2], show_progress_bar=False)
+    _warmup(model, test_queries)
 
     # Benchmark
     print(f"\nRunning {num_queries} queries...")
     for i, query in enumerate(test_queries[:num_queries], 1):
-        start = time.time()
+        _sync(device)
+        start = time.perf_counter_ns()
         _ = model.encode([query], show_progress_bar=False)
-        elapsed = time.time() - start
+        elapsed = _elapsed(device, start)
         times.append(elapsed)
         print(f"  Query {i}/{num_queries}: {elapsed*1000:.1f}ms")
 
@@ -61,9 +102,23 @@ def benchmark_embeddings(device='cpu', num_queries=10):
     print(f"\nResults:")
     print(f"  Average: {avg_time*1000:.1f}ms")
     print(f"  Median:  {median_time*1000:.1f}ms")
+    print(f"  P95:     {_p95(times)*1000:.1f}ms")
     print(f"  Min:     {min_time*1000:.1f}ms")
     print(f"  Max:     {max_time*1000:.1f}ms")
 
+    # Batched encode of the same queries (length-sorted, as SBERT does) to
+    # show steady-state throughput next to single-query latency
+    batch = sorted(test_queries[:num_queries], key=len)
+    _sync(device)
+    start = time.perf_counter_ns()
+    _ = model.encode(batch, batch_size=64, show_progress_bar=False)
+    batched_time = _elapsed(device, start)
+
+    print(f"\nBatched ({len(batch)} queries, one encode call):")
+    print(f"  Total:      {batched_time*1000:.1f}ms")
+    print(f"  Throughput: {len(batch)/batched_time:.0f} sentences/s")
+    print(f"  Batching speedup: {sum(times)/batched_time:.2f}x vs one query per call")
+
     return avg_time
 
 def benchmark_full_query(device='cpu', num_queries=5):
@@ -73,9 +128,7 @@ def benchmark_full_query(device='cpu', num_queries=5):
     print(f"{'='*70}")
 
     # Initialize
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    if device == 'gpu' and torch.cuda.is_available():
-        model = model.to('cuda')
+    model = _load_model(device, 'torch')
 
     client = chromadb.HttpClient(host='localhost', port=8001)
     collection = client.get_collection('coding_knowledge')
@@ -90,28 +143,45 @@ def benchmark_full_query(device='cpu', num_queries=5):
 
     times = []
 
+    # Warmup
+    _warmup(model, test_queries)
+
     print(f"\nRunning {num_queries} full queries...")
     for i, query in enumerate(test_queries[:num_queries], 1):
-        start = time.time()
+        _sync(device)
+        start = time.perf_counter_ns()
 
-        # Generate embedding
-        query_embedding = model.encode([query], show_progress_bar=False).tolist()
+        # Generate embedding (kept as numpy; chromadb serializes it at the HTTP boundary)
+        query_embedding = model.encode(query, convert_to_numpy=True,
+                                       normalize_embeddings=True, show_progress_bar=False)
 
-        # Vector search
+        # Vector search (distances only: this measures latency, not content)
         results = collection.query(
-            query_embeddings=query_embedding,
-            n_results=5
+            query_embeddings=[query_embedding],
+            n_results=5,
+            include=["distances"]
         )
 
-        elapsed = time.time() - start
+        elapsed = _elapsed(device, start)
         times.append(elapsed)
-        print(f"  Query {i}/{num_queries}: {elapsed*1000:.1f}ms ({len(results['documents'][0])} results)")
+        print(f"  Query {i}/{num_queries}: {elapsed*1000:.1f}ms ({len(results['distances'][0])} results)")
 
     avg_time = statistics.mean(times)
     print(f"\nAverage full query time: {avg_time*1000:.1f}ms")
+    print(f"Median: {statistics.median(times)*1000:.1f}ms | P95: {_p95(times)*1000:.1f}ms")
 
     return avg_time
 
+def benchmark_onnx_cpu(torch_cpu_time, num_queries=10):
+    """Benchmark the ONNX Runtime CPU backend against the torch CPU result"""
+    try:
+        onnx_time = benchmark_embeddings(device='cpu', num_queries=num_queries, backend='onnx')
+    except Exception as e:
+        print(f"\n⚠ ONNX backend unavailable ({e}); install with: pip install optimum[onnxruntime]")
+        return None
+    print(f"\nONNX vs torch (CPU): {torch_cpu_time / onnx_time:.2f}x")
+    return onnx_time
+
 def main():
     """Run all benchmarks"""
     print("\n" + "="*70)
@@ -131,6 +201,9 @@ def main():
         print("="*70)
         cpu_embed_time = benchmark_embeddings(device='cpu', num_queries=10)
         cpu_query_time = benchmark_full_query(device='cpu', num_queries=5)
+        onnx_embed_time = benchmark_onnx_cpu(cpu_embed_time)
+        if onnx_embed_time is not None:
+            results['cpu_onnx_embedding_ms'] = onnx_embed_time * 1000
 
         # Benchmark GPU
         print("\n" + "="*70)
@@ -174,6 +247,9 @@ def main():
         print("\n⚠ GPU not available, running CPU benchmark only")
         cpu_embed_time = benchmark_embeddings(device='cpu', num_queries=10)
         cpu_query_time = benchmark_full_query(device='cpu', num_queries=5)
+        onnx_embed_time = benchmark_onnx_cpu(cpu_embed_time)
+        if onnx_embed_time is not None:
+            results['cpu_onnx_embedding_ms'] = onnx_embed_time * 1000
 
     return results
 
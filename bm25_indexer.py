@@ -6,16 +6,123 @@ Builds and maintains BM25 keyword search index for RAG system
 
 import sys
 import chromadb
-from rank_bm25 import BM25Okapi
-import pickle
+import numpy as np
+import scipy.sparse as sp
+import functools
+import json
 import logging
-from typing import List, Dict, Any
+from collections import Counter, deque
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Any, Tuple
 import re
 import os
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# BM25 Okapi parameters (same defaults as rank_bm25.BM25Okapi)
+K1 = 1.5
+B = 0.75
+EPSILON = 0.25  # Floor for negative idf, as a fraction of the average idf
+SEARCH_CACHE_SIZE = 1024  # Ranked results kept per index for repeated queries
+BUILD_PAGE_SIZE = 5000  # Documents fetched from ChromaDB per request during build_index
+BUILD_PREFETCH_PAGES = 2  # Pages requested ahead while the current one is tokenized
+
+# Word runs of 3+ characters; same tokens as \b\w+\b filtered to len > 2
+_TOK_RE = re.compile(r'\w{3,}')
+
+# On-disk index: a directory of .npy arrays (memory-mapped on load) plus JSON side files
+INDEX_DIR = os.path.join(os.path.dirname(__file__), "bm25_index")
+_ARRAY_FILES = ("tf_indptr", "tf_indices", "tf_data", "idf", "doc_norm", "doc_text", "doc_offsets")
+
+
+def _dump_json(path: str, obj):
+    if HAS_ORJSON:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f)
+
+
+def _load_json(path: str):
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read()) if HAS_ORJSON else json.load(f)
+
+
+if HAS_NUMBA:
+    @numba.njit(cache=True, fastmath=True)
+    def _bm25_accumulate(indptr, indices, data, cols, term_weight, doc_norm, k1p1, scores):
+        """Scatter-add BM25 contributions of the query columns' postings into scores
+
+        Runs sequentially: postings of different columns share rows, so a parallel
+        loop over columns would race on scores.
+        """
+        for j in range(len(cols)):
+            col = cols[j]
+            weight = term_weight[j]
+            for p in range(indptr[col], indptr[col + 1]):
+                row = indices[p]
+                tf = np.float32(data[p])
+                scores[row] += weight * tf * k1p1 / (tf + doc_norm[row])
+
+
+class _DocumentStore(Sequence):
+    """Read-only document texts backed by one UTF-8 blob; each text is decoded on access"""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(len(self))[idx]]
+        idx = range(len(self))[idx]
+        start, end = self._offsets[idx], self._offsets[idx + 1]
+        return self._blob[start:end].tobytes().decode('utf-8')
+
+
+def _tokenize_corpus(docs: List[str]) -> Tuple[List[str], np.ndarray]:
+    """Tokenize documents into one flat token list plus per-document offsets into it"""
+    tokens = []
+    offsets = np.zeros(len(docs) + 1, dtype=np.int64)
+    findall = _TOK_RE.findall
+    for i, doc in enumerate(docs):
+        tokens.extend(findall(doc.lower()))
+        offsets[i + 1] = len(tokens)
+    return tokens, offsets
+
+
+def _build_tech_index(technology: np.ndarray) -> Dict[str, np.ndarray]:
+    """Map each technology to the sorted row ids of its documents"""
+    groups = {}
+    for row, tech in enumerate(technology.tolist()):
+        groups.setdefault(tech, []).append(row)
+    return {tech: np.asarray(rows, dtype=np.int32) for tech, rows in groups.items()}
+
+
+def _object_column(values) -> np.ndarray:
+    """1-D object array (np.array would build a 2-D array from equal-length tuples)"""
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
 
 class BM25Indexer:
     """
@@ -23,17 +130,35 @@ class BM25Indexer:
     """
 
     def __init__(self, chroma_host: str = "localhost", chroma_port: int = 8001):
-        self.chroma_client = chromadb.HttpClient(host=chroma_host, port=chroma_port)
-        self.bm25_index = None
+        self.chroma_host = chroma_host
+        self.chroma_port = chroma_port
+        self._chroma_client = None
+        self.vocab = {}  # term -> column id
+        self.tf_csc = None  # documents x terms raw term frequencies, column-major for per-term access
+        self.idf = None  # per-term idf
+        self.doc_norm = None  # per-document K_D = k1 * (1 - b + b * |D| / avgdl)
         self.documents = []
-        self.metadatas = []
-        self.doc_ids = []
+        # Per-document metadata as parallel columns, indexed by row id
+        self.doc_ids = _object_column([])
+        self.technology = _object_column([])  # None where the chunk has no technology
+        self.source_url = _object_column([])
+        self.source_file = _object_column([])
+        self.tech_index = {}  # technology -> sorted row ids
+
+        # Per-instance so cached rankings never outlive (or leak across) an index
+        self._rank_cached = functools.lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._rank)
+
+    @property
+    def chroma_client(self):
+        """ChromaDB client, connected on first use (only build_index needs it)"""
+        if self._chroma_client is None:
+            self._chroma_client = chromadb.HttpClient(host=self.chroma_host, port=self.chroma_port)
+        return self._chroma_client
 
     def tokenize(self, text: str) -> List[str]:
         """Simple tokenization for BM25"""
         # Lowercase, split on non-alphanumeric, remove short tokens
-        tokens = re.findall(r'\b\w+\b', text.lower())
-        return [t for t in tokens if len(t) > 2]
+        return _TOK_RE.findall(text.lower())
 
     def build_index(self, collection_name: str = "coding_knowledge"):
         """
@@ -49,58 +174,205 @@ class BM25Indexer:
             logger.error(f"Failed to get collection: {e}")
             raise
 
-        # Get all documents (this may take time for large collections)
-        logger.info("Fetching all documents from ChromaDB...")
-        all_data = collection.get(include=["documents", "metadatas"])
+        # Fetch documents page by page, tokenizing each page while the next ones download
+        total = collection.count()
+        logger.info(f"Fetching and tokenizing {total} documents from ChromaDB...")
 
-        self.documents = all_data["documents"]
-        self.metadatas = all_data["metadatas"]
-        self.doc_ids = all_data["ids"]
+        documents, doc_ids, technology, source_url, source_file = [], [], [], [], []
+        tokens = []
+        offsets = [np.zeros(1, dtype=np.int64)]
+        for page in self._fetch_pages(collection, total):
+            page_tokens, page_offsets = _tokenize_corpus(page["documents"])
+            offsets.append(page_offsets[1:] + len(tokens))
+            tokens.extend(page_tokens)
 
-        logger.info(f"Retrieved {len(self.documents)} documents")
+            documents.extend(page["documents"])
+            doc_ids.extend(page["ids"])
+            for m in page["metadatas"]:
+                technology.append(m.get("technology"))
+                source_url.append(m.get("source_url", ""))
+                source_file.append(m.get("source_file", ""))
+
+        self.documents = documents
+        self._set_metadata(doc_ids, technology, source_url, source_file)
 
-        # Tokenize all documents
-        logger.info("Tokenizing documents...")
-        tokenized_corpus = [self.tokenize(doc) for doc in self.documents]
+        logger.info(f"Retrieved {len(self.documents)} documents")
+        offsets = np.concatenate(offsets)
 
         # Build BM25 index
         logger.info("Building BM25 index...")
-        self.bm25_index = BM25Okapi(tokenized_corpus)
+        self._build_matrix(tokens, offsets)
+        self._rank_cached.cache_clear()
 
         logger.info(f"✓ BM25 index built with {len(self.documents)} documents")
 
+    @staticmethod
+    def _fetch_pages(collection, total: int) -> Iterator[Dict[str, Any]]:
+        """Yield collection.get() pages in order, keeping BUILD_PREFETCH_PAGES requests in flight"""
+        page_starts = iter(range(0, total, BUILD_PAGE_SIZE))
+        with ThreadPoolExecutor(max_workers=BUILD_PREFETCH_PAGES) as pool:
+            pending = deque()
+
+            def request_next():
+                offset = next(page_starts, None)
+                if offset is not None:
+                    pending.append(pool.submit(
+                        collection.get, limit=BUILD_PAGE_SIZE, offset=offset,
+                        include=["documents", "metadatas"]
+                    ))
+
+            for _ in range(BUILD_PREFETCH_PAGES):
+                request_next()
+            while pending:
+                page = pending.popleft().result()
+                request_next()
+                yield page
+
+    def _build_matrix(self, tokens: List[str], offsets: np.ndarray):
+        """Build the sparse term-frequency matrix and BM25 weights from a flat token stream"""
+        vocab = {}
+        term_ids = np.fromiter(
+            (vocab.setdefault(term, len(vocab)) for term in tokens), dtype=np.int64, count=len(tokens)
+        )
+        num_docs = len(offsets) - 1
+        doc_len = np.diff(offsets)
+        rows = np.repeat(np.arange(num_docs), doc_len)
+
+        # Duplicate (row, term) pairs are summed into int32 term frequencies
+        tf_csc = sp.csc_matrix(
+            (np.ones(len(term_ids), dtype=np.int32), (rows, term_ids)), shape=(num_docs, len(vocab))
+        )
+
+        # idf with rank_bm25's epsilon floor for terms in more than half the documents
+        doc_freq = np.diff(tf_csc.indptr)
+        idf = np.log(num_docs - doc_freq + 0.5) - np.log(doc_freq + 0.5)
+        if len(idf):
+            idf[idf < 0] = EPSILON * idf.mean()
+
+        avgdl = doc_len.mean() if num_docs else 0.0
+        doc_norm = K1 * (1 - B + B * doc_len / (avgdl or 1.0))
+
+        # Scoring weights are kept in float32 to halve memory traffic on the postings scan
+        self.vocab = vocab
+        self.tf_csc = tf_csc
+        self.idf = idf.astype(np.float32)
+        self.doc_norm = doc_norm.astype(np.float32)
+
+    def _set_metadata(self, doc_ids: List[str], technology: List[str],
+                      source_url: List[str], source_file: List[str]):
+        """Store metadata columns and index rows by technology"""
+        self.doc_ids = _object_column(doc_ids)
+        self.technology = _object_column(technology)
+        self.source_url = _object_column(source_url)
+        self.source_file = _object_column(source_file)
+        self.tech_index = _build_tech_index(self.technology)
+
+    def _query_terms(self, tokens: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Map query tokens to (column ids, query term counts), dropping unknown terms"""
+        counts = Counter(t for t in tokens if t in self.vocab)
+        cols = np.fromiter((self.vocab[t] for t in counts), dtype=np.int64, count=len(counts))
+        return cols, np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+
+    def _score(self, cols: np.ndarray, weights: np.ndarray,
+               rows: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 scores for the query columns, computed over their postings only
+
+        Returns (candidate row ids, scores) for documents containing at least one query term,
+        restricted to the sorted row ids in rows when given.
+        """
+        indptr, indices, data = self.tf_csc.indptr, self.tf_csc.indices, self.tf_csc.data
+        postings = [slice(indptr[c], indptr[c + 1]) for c in cols]
+        doc_rows = np.concatenate([indices[p] for p in postings])
+        candidates = np.unique(doc_rows)
+        if rows is not None:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+
+        if HAS_NUMBA:
+            # Fused kernel: no per-posting temporaries, one dense accumulator per query
+            scores = np.zeros(self.tf_csc.shape[0], dtype=np.float32)
+            _bm25_accumulate(
+                np.asarray(indptr), np.asarray(indices), np.asarray(data), cols,
+                self.idf[cols] * weights, np.asarray(self.doc_norm), np.float32(K1 + 1), scores
+            )
+            return candidates, scores[candidates]
+
+        tf = np.concatenate([data[p] for p in postings]).astype(np.float32, copy=False)
+        term_weight = np.repeat(self.idf[cols] * weights, [p.stop - p.start for p in postings])
+        if rows is not None:
+            # Drop postings of filtered-out documents before computing their contributions
+            keep = np.isin(doc_rows, candidates, assume_unique=False)
+            doc_rows, tf, term_weight = doc_rows[keep], tf[keep], term_weight[keep]
+
+        contrib = term_weight * tf * np.float32(K1 + 1) / (tf + self.doc_norm[doc_rows])
+        inverse = np.searchsorted(candidates, doc_rows)
+        return candidates, np.bincount(inverse, weights=contrib, minlength=len(candidates))
+
     def save_index(self, filepath: str = None):
-        """Save BM25 index to disk for fast loading"""
+        """Save BM25 index to disk as a directory of arrays for memory-mapped loading"""
         if filepath is None:
-            filepath = os.path.join(os.path.dirname(__file__), "bm25_index.pkl")
+            filepath = INDEX_DIR
 
         logger.info(f"Saving BM25 index to {filepath}...")
-
-        with open(filepath, 'wb') as f:
-            pickle.dump({
-                'bm25_index': self.bm25_index,
-                'documents': self.documents,
-                'metadatas': self.metadatas,
-                'doc_ids': self.doc_ids
-            }, f)
-
-        # Get file size
-        size_mb = os.path.getsize(filepath) / (1024 * 1024)
+        os.makedirs(filepath, exist_ok=True)
+
+        encoded = [doc.encode('utf-8') for doc in self.documents]
+        doc_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(doc) for doc in encoded], out=doc_offsets[1:])
+
+        arrays = {
+            "tf_indptr": self.tf_csc.indptr,
+            "tf_indices": self.tf_csc.indices,
+            "tf_data": self.tf_csc.data,
+            "idf": self.idf,
+            "doc_norm": self.doc_norm,
+            "doc_text": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "doc_offsets": doc_offsets,
+        }
+        for name in _ARRAY_FILES:
+            np.save(os.path.join(filepath, f"{name}.npy"), arrays[name])
+
+        # Vocabulary in column order, so the term -> column map is rebuilt by position
+        vocab_terms = sorted(self.vocab, key=self.vocab.get)
+        _dump_json(os.path.join(filepath, "vocab.json"), vocab_terms)
+        _dump_json(os.path.join(filepath, "metadata.json"), {
+            "shape": list(self.tf_csc.shape),
+            "doc_ids": self.doc_ids.tolist(),
+            "technology": self.technology.tolist(),
+            "source_url": self.source_url.tolist(),
+            "source_file": self.source_file.tolist()
+        })
+
+        # Get index size
+        size_mb = sum(
+            os.path.getsize(os.path.join(filepath, name)) for name in os.listdir(filepath)
+        ) / (1024 * 1024)
         logger.info(f"✓ BM25 index saved ({size_mb:.1f} MB)")
 
     def load_index(self, filepath: str = None):
-        """Load pre-built BM25 index from disk"""
+        """Load pre-built BM25 index from disk; arrays and document text stay memory-mapped"""
         if filepath is None:
-            filepath = os.path.join(os.path.dirname(__file__), "bm25_index.pkl")
+            filepath = INDEX_DIR
 
         logger.info(f"Loading BM25 index from {filepath}...")
 
-        with open(filepath, 'rb') as f:
-            data = pickle.load(f)
-            self.bm25_index = data['bm25_index']
-            self.documents = data['documents']
-            self.metadatas = data['metadatas']
-            self.doc_ids = data['doc_ids']
+        # Raises FileNotFoundError when the index has not been built
+        meta = _load_json(os.path.join(filepath, "metadata.json"))
+        vocab_terms = _load_json(os.path.join(filepath, "vocab.json"))
+        arrays = {
+            name: np.load(os.path.join(filepath, f"{name}.npy"), mmap_mode='r')
+            for name in _ARRAY_FILES
+        }
+
+        self.vocab = {term: col for col, term in enumerate(vocab_terms)}
+        self.tf_csc = sp.csc_matrix(
+            (arrays["tf_data"], arrays["tf_indices"], arrays["tf_indptr"]),
+            shape=tuple(meta["shape"]), copy=False
+        )
+        self.idf = arrays["idf"]
+        self.doc_norm = arrays["doc_norm"]
+        self.documents = _DocumentStore(arrays["doc_text"], arrays["doc_offsets"])
+        self._set_metadata(meta["doc_ids"], meta["technology"], meta["source_url"], meta["source_file"])
+        self._rank_cached.cache_clear()
 
         logger.info(f"✓ BM25 index loaded ({len(self.documents)} docs)")
 
@@ -110,41 +382,77 @@ class BM25Indexer:
 
         Returns: List of results with scores, sorted by BM25 relevance
         """
-        if not self.bm25_index:
+        if self.tf_csc is None:
             raise ValueError("BM25 index not loaded. Call build_index() or load_index() first.")
 
+        rows, scores = self._rank_cached(query, top_k, technology_filter)
+
+        # Create results with metadata for the selected documents only, gathered column-wise
+        rows = np.asarray(rows, dtype=np.int64)
+        return [
+            {
+                "doc_id": doc_id,
+                "content": self.documents[idx],
+                "bm25_score": score,
+                "technology": "Unknown" if tech is None else tech,
+                "source_url": source_url,
+                "source_file": source_file
+            }
+            for idx, score, doc_id, tech, source_url, source_file in zip(
+                rows.tolist(), scores, self.doc_ids[rows].tolist(),
+                self.technology[rows].tolist(), self.source_url[rows].tolist(),
+                self.source_file[rows].tolist()
+            )
+        ]
+
+    def _rank(self, query: str, top_k: int, technology_filter: str) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+        """Row ids and BM25 scores of the top_k matches, best first (cached via _rank_cached)"""
         # Tokenize query
         tokenized_query = self.tokenize(query)
 
         if not tokenized_query:
             logger.warning(f"Query '{query}' produced no tokens after tokenization")
-            return []
+            return (), ()
+
+        # Get BM25 scores for documents sharing a term with the query (all others score zero)
+        cols, weights = self._query_terms(tokenized_query)
+        if not len(cols):
+            return (), ()
 
-        # Get BM25 scores for all documents
-        scores = self.bm25_index.get_scores(tokenized_query)
+        # Apply technology filter before scoring by restricting to that technology's rows
+        rows = None
+        if technology_filter:
+            rows = self.tech_index.get(technology_filter)
+            if rows is None:
+                return (), ()
+        candidates, scores = self._score(cols, weights, rows)
 
-        # Create results with metadata
-        results = []
-        for idx, score in enumerate(scores):
-            if score > 0:  # Only include documents with non-zero scores
-                metadata = self.metadatas[idx]
+        # Only include documents with non-zero scores
+        keep = scores > 0
+        candidates, scores = candidates[keep], scores[keep]
 
-                # Apply technology filter
-                if technology_filter and metadata.get("technology") != technology_filter:
-                    continue
+        # Select top_k by BM25 score (descending) without sorting every candidate
+        if 0 < top_k < len(scores):
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.lexsort((candidates[top], -scores[top]))][:top_k]
 
-                results.append({
-                    "doc_id": self.doc_ids[idx],
-                    "content": self.documents[idx],
-                    "bm25_score": float(score),
-                    "technology": metadata.get("technology", "Unknown"),
-                    "source_url": metadata.get("source_url", ""),
-                    "source_file": metadata.get("source_file", "")
-                })
+        return tuple(candidates[top].tolist()), tuple(scores[top].tolist())
 
-        # Sort by BM25 score (descending) and return top_k
-        results.sort(key=lambda x: x["bm25_score"], reverse=True)
-        return results[:top_k]
+
+@functools.lru_cache(maxsize=None)
+def open_index_shared(path: str = INDEX_DIR) -> BM25Indexer:
+    """
+    Open a saved index read-only, once per process.
+
+    The arrays and document text are memory-mapped from the index files, so every
+    worker process that opens the same index shares its pages through the OS page
+    cache instead of holding a private copy. Raises FileNotFoundError if not built.
+    """
+    indexer = BM25Indexer()
+    indexer.load_index(path)
+    return indexer
 
 
 def main():
@@ -184,7 +492,7 @@ def main():
         logger.info("\n" + "=" * 60)
         logger.info("✓ BM25 index created successfully!")
         logger.info("=" * 60)
-        logger.info(f"Index location: {os.path.dirname(__file__)}/bm25_index.pkl")
+        logger.info(f"Index location: {INDEX_DIR}")
         logger.info(f"Total documents: {len(indexer.documents)}")
         logger.info("\nNext steps:")
         logger.info("1. Integrate hybrid_search tool into MCP server")
@@ -6,14 +6,36 @@ Tracks query frequency and pre-warms cache with popular queries
 
 import redis
 import json
+import os
 import time
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+import hashlib
+import atexit
+import threading
+from collections import Counter, deque
+from typing import Any, Callable, List, Dict, Optional, Tuple
+from dataclasses import asdict, dataclass
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+QUERY_FREQ_KEY = "rag:query_freq"  # zset: query id -> hit count
+QUERY_WARMED_KEY = "rag:query_warmed"  # zset: query id -> last warm timestamp
+QUERY_META_TTL = 86400 * 30  # 30 day TTL
+TRACK_BUFFER_SIZE = 1024  # Max query events held in memory between flushes
+TRACK_FLUSH_EVERY = 64  # Flush once this many events are buffered...
+TRACK_FLUSH_INTERVAL = 5.0  # ...or this many seconds after the last flush
+SNAPSHOT_PATH = os.getenv(
+    "RAG_QUERY_FREQ_SNAPSHOT", os.path.join(os.path.dirname(__file__), ".query_freq_snapshot.json")
+)
+SNAPSHOT_TOP_N = 1000  # Hottest queries kept in the on-disk snapshot
+SNAPSHOT_INTERVAL = 300  # Seconds between snapshots taken on flush
+
+
+def _query_id(query: str) -> str:
+    """Fixed-size Redis member for a query; the text itself is stored once in its meta hash"""
+    return hashlib.blake2b(query.encode('utf-8'), digest_size=16).hexdigest()
+
 
 @dataclass
 class QueryStats:
@@ -35,6 +57,11 @@ class CacheWarmer:
     """
 
     def __init__(self, redis_host: str = "127.0.0.1", redis_port: int = 6379, redis_db: int = 2):
+        self._buffer = deque(maxlen=TRACK_BUFFER_SIZE)
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.time()
+        self._last_snapshot = time.time()
+
         try:
             self.redis = redis.Redis(
                 host=redis_host,
@@ -45,6 +72,11 @@ class CacheWarmer:
             )
             self.redis.ping()
             logger.info(f"Cache warmer initialized: {redis_host}:{redis_port}")
+
+            # Redis lost the hit history (restart/flush): reseed it from the last snapshot
+            if self.redis.zcard(QUERY_FREQ_KEY) == 0 and os.path.exists(SNAPSHOT_PATH):
+                self.restore_frequency()
+            atexit.register(self._on_exit)
         except Exception as e:
             logger.warning(f"Redis unavailable for cache warming: {e}")
             self.redis = None
@@ -54,52 +86,194 @@ class CacheWarmer:
         if not self.redis:
             return
 
+        # Buffer in process; Redis writes are batched by flush()
+        timestamp = time.time()
+        self._buffer.append((query, technology_filter, timestamp))
+        if (len(self._buffer) >= TRACK_FLUSH_EVERY
+                or timestamp - self._last_flush >= TRACK_FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        """Write buffered query events to Redis in a single pipeline"""
+        if not self.redis:
+            return
+
+        with self._flush_lock:
+            # Pop exactly the events seen here; ones appended meanwhile stay for the next flush
+            events = [self._buffer.popleft() for _ in range(len(self._buffer))]
+            self._last_flush = time.time()
+
+        if not events:
+            return
+
+        # Coalesce repeats: one increment per query, metadata from its latest event
+        hits = Counter(query for query, _, _ in events)
+        latest = {query: (technology_filter, timestamp) for query, technology_filter, timestamp in events}
+
         try:
-            timestamp = time.time()
-            key = f"rag:query_freq"
+            pipe = self.redis.pipeline(transaction=False)
+            for query, count in hits.items():
+                technology_filter, timestamp = latest[query]
+                query_id = _query_id(query)
 
-            # Increment hit count
-            self.redis.zincrby(key, 1, query)
+                # Increment hit count
+                pipe.zincrby(QUERY_FREQ_KEY, count, query_id)
 
-            # Store metadata
-            meta_key = f"rag:query_meta:{query}"
-            self.redis.hset(meta_key, mapping={
-                "last_accessed": timestamp,
-                "technology_filter": technology_filter or "",
-            })
-            self.redis.expire(meta_key, 86400 * 30)  # 30 day TTL
+                # Store metadata
+                meta_key = f"rag:query_meta:{query_id}"
+                pipe.hset(meta_key, mapping={
+                    "query": query,
+                    "last_accessed": timestamp,
+                    "technology_filter": technology_filter or "",
+                })
+                pipe.expire(meta_key, QUERY_META_TTL)
+            pipe.execute()
 
         except Exception as e:
             logger.error(f"Failed to track query: {e}")
+            return
+
+        if time.time() - self._last_snapshot >= SNAPSHOT_INTERVAL:
+            self.snapshot_frequency()
+
+    def _on_exit(self):
+        self.flush()
+        self.snapshot_frequency()
+
+    def snapshot_frequency(self, path: str = SNAPSHOT_PATH, n: int = SNAPSHOT_TOP_N) -> int:
+        """Save the top n tracked queries (hits and metadata) to a JSON file; returns entries saved"""
+        if not self.redis:
+            return 0
+
+        self._last_snapshot = time.time()
+        try:
+            top_queries = self.redis.zrevrange(QUERY_FREQ_KEY, 0, n - 1, withscores=True)
+            stats = self._query_stats(top_queries)
+
+            # Write to a temp file and rename so a crash never leaves a truncated snapshot
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump([asdict(s) for s in stats], f)
+            os.replace(tmp_path, path)
+            return len(stats)
+
+        except Exception as e:
+            logger.error(f"Failed to snapshot query frequency: {e}")
+            return 0
+
+    def restore_frequency(self, path: str = SNAPSHOT_PATH) -> int:
+        """Reload hit counts and metadata from a snapshot file; returns entries restored"""
+        if not self.redis:
+            return 0
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+
+            pipe = self.redis.pipeline(transaction=False)
+            for entry in entries:
+                query_id = _query_id(entry["query"])
+                pipe.zadd(QUERY_FREQ_KEY, {query_id: entry["hit_count"]})
+                meta_key = f"rag:query_meta:{query_id}"
+                pipe.hset(meta_key, mapping={
+                    "query": entry["query"],
+                    "last_accessed": entry["last_accessed"],
+                    "technology_filter": entry["technology_filter"] or "",
+                })
+                pipe.expire(meta_key, QUERY_META_TTL)
+            pipe.execute()
+
+            logger.info(f"Restored {len(entries)} tracked queries from {path}")
+            return len(entries)
+
+        except Exception as e:
+            logger.error(f"Failed to restore query frequency: {e}")
+            return 0
 
     def get_top_queries(self, n: int = 50) -> List[QueryStats]:
         """Get top N most frequent queries"""
         if not self.redis:
             return []
 
+        self.flush()
+
         try:
-            key = "rag:query_freq"
-            top_queries = self.redis.zrevrange(key, 0, n - 1, withscores=True)
+            top_queries = self.redis.zrevrange(QUERY_FREQ_KEY, 0, n - 1, withscores=True)
+            return self._query_stats(top_queries)
+
+        except Exception as e:
+            logger.error(f"Failed to get top queries: {e}")
+            return []
+
+    def _query_stats(self, ranked: List[Tuple[bytes, float]]) -> List[QueryStats]:
+        """Build QueryStats for (query id, hit count) pairs from the frequency zset"""
+        # Fetch all metadata hashes in one round-trip
+        pipe = self.redis.pipeline(transaction=False)
+        for member, _ in ranked:
+            pipe.hgetall(f"rag:query_meta:{member.decode('utf-8')}")
+        metas = pipe.execute()
+
+        stats = []
+        for (member, score), meta in zip(ranked, metas):
+            if meta:
+                # Entries tracked before query ids have the query text as the member
+                stats.append(QueryStats(
+                    query=meta.get(b'query', member).decode('utf-8'),
+                    hit_count=int(score),
+                    last_accessed=float(meta.get(b'last_accessed', 0)),
+                    technology_filter=meta.get(b'technology_filter', b'').decode('utf-8') or None
+                ))
 
-            stats = []
-            for query_bytes, score in top_queries:
-                query = query_bytes.decode('utf-8')
-                meta_key = f"rag:query_meta:{query}"
-                meta = self.redis.hgetall(meta_key)
+        return stats
 
-                if meta:
-                    stats.append(QueryStats(
-                        query=query,
-                        hit_count=int(score),
-                        last_accessed=float(meta.get(b'last_accessed', 0)),
-                        technology_filter=meta.get(b'technology_filter', b'').decode('utf-8') or None
-                    ))
+    def warm_candidates(self, warm_fn: Callable[[str, Optional[str]], Any], min_hits: int = 5,
+                        max_keys: int = 200, rate_per_sec: float = 10, rewarm_after: float = 3600) -> int:
+        """
+        Re-run hot queries through warm_fn(query, technology_filter) to pre-populate caches
 
-            return stats
+        Only queries with at least min_hits hits are considered (hottest first, up to max_keys),
+        queries warmed within the last rewarm_after seconds are skipped, and calls are paced
+        at rate_per_sec so a cold start does not stampede the vector store.
 
+        Returns: Number of queries warmed
+        """
+        if not self.redis:
+            return 0
+
+        self.flush()
+
+        try:
+            hot = self.redis.zrevrangebyscore(
+                QUERY_FREQ_KEY, "+inf", min_hits, start=0, num=max_keys, withscores=True
+            )
+            candidates = self._query_stats(hot)
+
+            pipe = self.redis.pipeline(transaction=False)
+            for stats in candidates:
+                pipe.zscore(QUERY_WARMED_KEY, _query_id(stats.query))
+            last_warmed = pipe.execute()
         except Exception as e:
-            logger.error(f"Failed to get top queries: {e}")
-            return []
+            logger.error(f"Failed to get warm candidates: {e}")
+            return 0
+
+        warmed = 0
+        interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        for stats, warmed_at in zip(candidates, last_warmed):
+            if warmed_at is not None and time.time() - warmed_at < rewarm_after:
+                continue
+
+            try:
+                warm_fn(stats.query, stats.technology_filter)
+                self.redis.zadd(QUERY_WARMED_KEY, {_query_id(stats.query): time.time()})
+                warmed += 1
+            except Exception as e:
+                logger.warning(f"Failed to warm query '{stats.query[:50]}': {e}")
+
+            if interval:
+                time.sleep(interval)
+
+        logger.info(f"Cache warming: {warmed}/{len(candidates)} hot queries warmed (min_hits={min_hits})")
+        return warmed
 
     def get_stats(self) -> Dict:
         """Get cache warming statistics"""
@@ -107,7 +281,8 @@ class CacheWarmer:
             return {"error": "Redis unavailable"}
 
         try:
-            total_queries = self.redis.zcard("rag:query_freq")
+            self.flush()
+            total_queries = self.redis.zcard(QUERY_FREQ_KEY)
             top_queries = self.get_top_queries(20)
 
             return {
@@ -5,54 +5,368 @@ Purpose: High-performance three-level caching with advanced optimizations
 
 Optimizations:
 - Connection pooling for better concurrency
-- LZ4 compression for large data (60-80% size reduction)
+- zstd/LZ4 compression for large data (60-80% size reduction)
 - Pipeline operations for batch caching
-- MessagePack serialization (faster than pickle)
+- MessagePack serialization via msgspec or msgpack (faster than pickle)
 - Adaptive TTL based on access frequency
+- Optional Bloom-filter admission that skips caching one-hit wonders
+- In-process L0 cache of decoded embeddings in front of Redis
+- Optional shared-memory embedding table shared by workers on one host
+- Optional bfloat16/int8 storage for cached embeddings (2-4x smaller)
 - Cache warming for common queries
 - Retry logic for transient failures
+- Async wrappers so event-loop callers can overlap cache lookups
 
 Target: 70%+ cache hit rate, <0.5ms cache operations
 Performance gain: ~100x faster for cache hits (<1ms vs 6ms)
 """
 
+import asyncio
 import redis
 from redis import ConnectionPool
+import functools
 import hashlib
 import json
 import logging
+import math
+import queue
 from typing import Optional, Dict, Any, List, Tuple
 import numpy as np
+from collections import Counter, OrderedDict
 from datetime import timedelta
+import struct
+import threading
 import time
+import zlib
+from multiprocessing import resource_tracker, shared_memory
 
 # Try to import optional dependencies for better performance
+try:
+    import msgspec
+    HAS_MSGSPEC = True
+except ImportError:
+    HAS_MSGSPEC = False
+
 try:
     import msgpack
     HAS_MSGPACK = True
 except ImportError:
-    import pickle
     HAS_MSGPACK = False
-    logging.warning("msgpack not available, using pickle (slower). Install with: pip install msgpack")
+
+if not (HAS_MSGSPEC or HAS_MSGPACK):
+    import pickle
+    logging.warning("msgspec/msgpack not available, using pickle (slower). Install with: pip install msgspec")
+
+# Both MessagePack backends write the same wire format, so cached entries are interchangeable
+SERIALIZATION = 'msgspec' if HAS_MSGSPEC else 'msgpack' if HAS_MSGPACK else 'pickle'
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
 
 try:
+    import lz4.block
     import lz4.frame
     HAS_LZ4 = True
 except ImportError:
     HAS_LZ4 = False
-    logging.warning("lz4 not available, compression disabled. Install with: pip install lz4")
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+if not (HAS_ZSTD or HAS_LZ4):
+    logging.warning("zstandard/lz4 not available, compression disabled. Install with: pip install zstandard")
+
+COMPRESSION = 'zstd' if HAS_ZSTD else 'LZ4' if HAS_LZ4 else 'disabled'
+ZSTD_LEVEL = 1  # Fastest level; ratio on cache payloads is close to LZ4 at similar speed
+QUERY_HASH_CACHE_SIZE = 2048  # Recent query text -> hash mappings kept in process
+TIMING_SAMPLE_EVERY = 64  # Operations per latency sample folded into avg_cache_operation_ms
+LATENCY_EWMA_ALPHA = 0.02  # Weight of each new latency sample in avg_cache_operation_ms
+SCAN_BATCH_SIZE = 1000  # Keys per SCAN step and per UNLINK pipeline in cache maintenance
+TARGET_HIT_RATE = 0.85  # Default per-key hit probability adaptive TTLs are sized for
+ADAPTIVE_TTL_MAX_FACTOR = 4  # Adaptive TTLs range from 1x to this multiple of the base TTL
+ADMISSION_FILTER_BITS = 1 << 20  # Bits per Bloom filter generation (128 KB, ~1% FPR at 100k queries)
+ADMISSION_FILTER_HASHES = 4  # Bit positions set per query
+ADMISSION_FILTER_WINDOW = 3600  # Seconds per generation; queries are remembered for 1-2 windows
+L0_CACHE_SIZE = 1024  # Decoded embeddings kept in process (0 disables the L0 cache)
+L0_CACHE_TTL = 300  # Seconds an L0 entry is served before going back to Redis
+SHM_SLOTS = 4096  # Embedding slots in the shared-memory table (~6 MB at 384 dims)
+SHM_EMBEDDING_DIM = 384  # Only float32 vectors of this length go to shared memory
+EMBEDDING_PRECISIONS = ('float32', 'bfloat16', 'int8')  # Storage formats for cached embeddings
+ACCESS_COUNT_TTL = 86400  # Access counters reset daily
+ACCESS_LFU_SIZE = 10000  # Keys tracked by the in-process access counter (least recent evicted)
+ACCESS_FLUSH_EVERY = 100  # Accesses between syncs of counter deltas to Redis
+
+_ACCESS_FLUSH_STOP = None  # Queued by close() to stop the access-count worker
+
+# Cache entry layout: zstd frames and uncompressed payloads are stored as-is and told
+# apart by the zstd frame magic (serialized payloads are msgpack maps, pickles or
+# embedding frames, which never start with it or with a byte <= CODEC_ZSTD). LZ4 blocks have no magic, so they
+# keep a one-byte codec prefix, as did all entries written by earlier versions.
+CODEC_NONE = 0
+CODEC_LZ4_FRAME = 1  # Written by earlier versions; still readable
+CODEC_LZ4_BLOCK = 2
+CODEC_ZSTD = 3
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+_LZ4_BLOCK_PREFIX = bytes([CODEC_LZ4_BLOCK])
+
+# Embedding frame: <u1 magic><u1 dtype code><u2 dim> then the raw vector (int8 adds a <f4 scale).
+# The magic is outside what msgpack maps (0x80-0x8f, 0xde, 0xdf) and pickles (0x80) start with.
+EMBED_MAGIC = 0xEB
+_EMBED_HEADER = struct.Struct('<BBH')
+_EMBED_SCALE = struct.Struct('<f')
+EMBED_FLOAT32, EMBED_FLOAT64, EMBED_FLOAT16, EMBED_BFLOAT16, EMBED_INT8 = 1, 2, 3, 4, 5
+_EMBED_DTYPE_CODES = {np.dtype('<f4'): EMBED_FLOAT32, np.dtype('<f8'): EMBED_FLOAT64, np.dtype('<f2'): EMBED_FLOAT16}
+_EMBED_CODE_DTYPES = {code: dtype for dtype, code in _EMBED_DTYPE_CODES.items()}
+# Full-precision float vectors are close to incompressible (zstd saves ~4% at ~10us per
+# 384-dim vector), so their frames are stored uncompressed
+_EMBED_UNCOMPRESSED = frozenset(_EMBED_CODE_DTYPES)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _dumps_response(response: Dict) -> bytes:
+    """Encode a response as JSON bytes (orjson, then msgspec, then stdlib)"""
+    if HAS_ORJSON:
+        return orjson.dumps(response, option=orjson.OPT_NON_STR_KEYS)
+    if HAS_MSGSPEC:
+        return msgspec.json.encode(response)
+    return json.dumps(response).encode('utf-8')
+
+
+def _loads_response(data: bytes) -> Dict:
+    """Decode a JSON response written by any of the encoders above"""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    if HAS_MSGSPEC:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def _hexdigest(data) -> bytes:
+    """Hex digest as ASCII bytes (xxh3-128 when available, MD5 otherwise)"""
+    if HAS_XXHASH:
+        return xxhash.xxh3_128_hexdigest(data).encode('ascii')
+    return hashlib.md5(data).hexdigest().encode('ascii')
+
+
+@functools.lru_cache(maxsize=QUERY_HASH_CACHE_SIZE)
+def _hash_text(text: str) -> bytes:
+    """Hash query text for cache keys"""
+    return _hexdigest(text.encode('utf-8'))
+
+
+def _filter_part(technology_filter: Optional[str]) -> bytes:
+    """Technology filter segment of a cache key"""
+    return technology_filter.encode('utf-8') if technology_filter else b'none'
+
+
+class _AdmissionFilter:
+    """
+    Two-generation Bloom filter of recently seen query hashes
+
+    check_and_add() reports whether a hash was seen in the current or previous
+    window and records it. Every window the current generation becomes the
+    previous one and a fresh one starts, so memory stays fixed.
+    """
+
+    def __init__(self, bits: int = ADMISSION_FILTER_BITS, hashes: int = ADMISSION_FILTER_HASHES,
+                 window: float = ADMISSION_FILTER_WINDOW):
+        self.bits = bits
+        self.hashes = hashes
+        self.window = window
+        self._current = bytearray(bits // 8)
+        self._previous = bytearray(bits // 8)
+        self._rotated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _positions(self, hexdigest: bytes) -> List[int]:
+        # Double hashing from the two 64-bit halves of the key's 128-bit hex digest
+        h1 = int(hexdigest[:16], 16)
+        h2 = int(hexdigest[16:32], 16) | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def check_and_add(self, hexdigest: bytes) -> bool:
+        """Return True if hexdigest was seen within the last window or two, then record it"""
+        positions = self._positions(hexdigest)
+
+        with self._lock:
+            if time.monotonic() - self._rotated_at >= self.window:
+                self._previous = self._current
+                self._current = bytearray(self.bits // 8)
+                self._rotated_at = time.monotonic()
+
+            current, previous = self._current, self._previous
+            seen_current = seen_previous = True
+            for pos in positions:
+                byte, mask = pos >> 3, 1 << (pos & 7)
+                seen_current = seen_current and bool(current[byte] & mask)
+                seen_previous = seen_previous and bool(previous[byte] & mask)
+                current[byte] |= mask
+        return seen_current or seen_previous
+
+
+def _pack_embedding(embedding: np.ndarray, precision: str) -> Optional[bytes]:
+    """
+    Frame a 1-D embedding as a fixed header plus raw bytes (no serializer)
+
+    Returns None for shapes or dtypes the frame can't hold, which are
+    serialized generically instead.
+    """
+    if embedding.ndim != 1 or embedding.shape[0] > 0xFFFF:
+        return None
+    dim = embedding.shape[0]
+
+    if precision == 'bfloat16':
+        bits = np.ascontiguousarray(embedding, dtype=np.float32).view(np.uint32)
+        rounded = (bits + 0x7FFF + ((bits >> 16) & 1)) >> 16  # Round to nearest even
+        return _EMBED_HEADER.pack(EMBED_MAGIC, EMBED_BFLOAT16, dim) + rounded.astype('<u2').tobytes()
+    if precision == 'int8':
+        values = np.ascontiguousarray(embedding, dtype=np.float32)
+        scale = float(np.abs(values).max()) / 127 or 1.0
+        quantized = np.round(values / scale).astype(np.int8)
+        return _EMBED_HEADER.pack(EMBED_MAGIC, EMBED_INT8, dim) + _EMBED_SCALE.pack(scale) + quantized.tobytes()
+
+    code = _EMBED_DTYPE_CODES.get(embedding.dtype.newbyteorder('<'))
+    if code is None:
+        return None
+    data = np.ascontiguousarray(embedding, dtype=_EMBED_CODE_DTYPES[code])
+    return _EMBED_HEADER.pack(EMBED_MAGIC, code, dim) + data.tobytes()
+
+
+def _unpack_embedding(data: bytes) -> np.ndarray:
+    """Read an embedding frame; full-precision vectors are a view over data"""
+    _, code, dim = _EMBED_HEADER.unpack_from(data)
+    offset = _EMBED_HEADER.size
+    if code == EMBED_BFLOAT16:
+        bits = np.frombuffer(data, dtype='<u2', count=dim, offset=offset).astype(np.uint32) << 16
+        return bits.view(np.float32)
+    if code == EMBED_INT8:
+        (scale,) = _EMBED_SCALE.unpack_from(data, offset)
+        quantized = np.frombuffer(data, dtype=np.int8, count=dim, offset=offset + _EMBED_SCALE.size)
+        return quantized.astype(np.float32) * np.float32(scale)
+    return np.frombuffer(data, dtype=_EMBED_CODE_DTYPES[code], count=dim, offset=offset)
+
+
+class _LocalCache:
+    """Small thread-safe LRU with a fixed TTL, holding decoded values in process"""
+
+    def __init__(self, maxsize: int = L0_CACHE_SIZE, ttl: float = L0_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: bytes, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: bytes):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _SharedEmbeddingStore:
+    """
+    Direct-mapped table of float32 embeddings in a named shared-memory segment
+
+    Workers on the same host attach to the same segment. Each key hashes to one
+    slot and a newer write overwrites it. There is no cross-process lock:
+    every slot carries a checksum, and a torn read fails it and is a miss.
+    """
+
+    def __init__(self, name: str, slots: int = SHM_SLOTS, dim: int = SHM_EMBEDDING_DIM):
+        self.slots = slots
+        self.dim = dim
+        self._dtype = np.dtype([
+            ('key', 'V16'),
+            ('expires', '<f8'),
+            ('check', '<u8'),
+            ('data', '<f4', (dim,)),
+        ])
+        size = slots * self._dtype.itemsize
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._shm = shared_memory.SharedMemory(name=name)
+            if self._shm.size < size:
+                raise ValueError(f"Shared memory segment {name} is smaller than {slots} slots of {dim} dims")
+        # The segment outlives this process; keep the resource tracker from unlinking it at exit
+        resource_tracker.unregister(self._shm._name, 'shared_memory')
+        self._table = np.ndarray((slots,), dtype=self._dtype, buffer=self._shm.buf)
+
+    @staticmethod
+    def _checksum(row: np.void) -> int:
+        data = row['key'].tobytes() + row['expires'].tobytes() + row['data'].tobytes()
+        return xxhash.xxh3_64_intdigest(data) if HAS_XXHASH else zlib.crc32(data)
+
+    def _slot(self, hexdigest: bytes) -> Tuple[int, bytes]:
+        key = bytes.fromhex(hexdigest[:32].decode('ascii'))
+        return int.from_bytes(key[:8], 'little') % self.slots, key
+
+    def get(self, hexdigest: bytes) -> Optional[np.ndarray]:
+        slot, key = self._slot(hexdigest)
+        row = self._table[slot].copy()  # Snapshot, then validate; a concurrent writer fails the checksum
+        if row['key'].tobytes() != key or row['expires'] < time.time():
+            return None
+        if row['check'] != self._checksum(row):
+            return None
+        return row['data']
+
+    def put(self, hexdigest: bytes, embedding: np.ndarray, ttl: float) -> bool:
+        if embedding.dtype != np.float32 or embedding.shape != (self.dim,):
+            return False
+        slot, key = self._slot(hexdigest)
+        row = np.zeros((), dtype=self._dtype)
+        row['key'] = np.void(key)
+        row['expires'] = time.time() + ttl
+        row['data'] = embedding
+        row['check'] = self._checksum(row)
+        self._table[slot] = row
+        return True
+
+    def clear(self):
+        self._table['expires'] = 0
+
+
 class RAGCacheManagerOptimized:
     """
     Optimized three-level caching system for RAG queries
 
     Enhancements over base version:
     - Connection pooling (max 10 connections)
-    - LZ4 compression (60-80% size reduction)
+    - zstd/LZ4 compression (60-80% size reduction)
     - MessagePack serialization (2-5x faster than pickle)
     - Pipeline operations for batch caching
     - Adaptive TTL based on access patterns
@@ -63,18 +377,19 @@ class RAGCacheManagerOptimized:
       - Caches computed embeddings by query text hash
       - TTL: 1-4 hours (adaptive based on access frequency)
       - Key format: emb:{query_hash}
-      - Compression: LZ4 (reduces 384-float array from 1.5KB to ~300 bytes)
+      - Storage: raw float32 frame (1.5KB); bfloat16/int8 frames optional, zstd/LZ4 on bfloat16
 
     Level 2: Retrieval Cache (Semantic)
       - Caches vector search results by embedding similarity
-      - TTL: 6-12 hours (adaptive)
+      - TTL: 6-24 hours (adaptive)
       - Key format: ret:{embedding_hash}:{filter}
-      - Compression: LZ4 for large result sets
+      - Compression: zstd/LZ4 for large result sets
 
     Level 3: Response Cache
       - Caches complete formatted responses
-      - TTL: 24-48 hours (adaptive)
+      - TTL: 24-96 hours (adaptive)
       - Key format: resp:{query_hash}:{filter}:{top_k}
+        (resp:{namespace}:{query_hash}:{filter}:{top_k} with a response_namespace)
       - Compression: LZ4 for responses >1KB
     """
 
@@ -90,6 +405,12 @@ class RAGCacheManagerOptimized:
         max_connections: int = 10,  # Connection pool size
         compression_threshold: int = 512,  # Compress data >512 bytes
         enable_adaptive_ttl: bool = True,
+        enable_admission_filter: bool = False,
+        l0_cache_size: int = L0_CACHE_SIZE,
+        shared_memory_name: Optional[str] = None,
+        embedding_precision: str = 'float32',
+        target_hit_rate: float = TARGET_HIT_RATE,
+        response_namespace: Optional[str] = None,
         socket_timeout: int = 5,
         retry_attempts: int = 3
     ):
@@ -107,13 +428,56 @@ class RAGCacheManagerOptimized:
             max_connections: Maximum Redis connections in pool
             compression_threshold: Compress data larger than this (bytes)
             enable_adaptive_ttl: Enable adaptive TTL based on access frequency
+            enable_admission_filter: Only cache an embedding the second time its query is seen
+            l0_cache_size: Decoded embeddings kept in process ahead of Redis (0 disables)
+            shared_memory_name: Shared-memory segment for embeddings shared by workers on this host
+            embedding_precision: Storage format for cached embeddings: 'float32' (exact),
+                'bfloat16' (half size) or 'int8' (quarter size); lossy formats return float32
+            target_hit_rate: Per-key hit probability adaptive TTLs aim for (0-1)
+            response_namespace: Separate response keys for clients that cache a different
+                response shape in the same Redis db
             socket_timeout: Redis socket timeout (seconds)
             retry_attempts: Number of retry attempts for failed operations
         """
         self.compression_threshold = compression_threshold
         self.enable_adaptive_ttl = enable_adaptive_ttl
+        self.target_hit_rate = target_hit_rate
+        if embedding_precision not in EMBEDDING_PRECISIONS:
+            raise ValueError(f"embedding_precision must be one of {EMBEDDING_PRECISIONS}, got {embedding_precision!r}")
+        self.embedding_precision = embedding_precision
+        self._response_prefix = b'resp:%s:' % response_namespace.encode('utf-8') if response_namespace else b'resp:'
+        self._admission = _AdmissionFilter() if enable_admission_filter else None
+        self._l0 = _LocalCache(l0_cache_size) if l0_cache_size > 0 else None
+
+        self._shm = None
+        if shared_memory_name:
+            try:
+                self._shm = _SharedEmbeddingStore(shared_memory_name)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Shared-memory embedding cache unavailable: {e}")
         self.retry_attempts = retry_attempts
 
+        # In-process access counts drive adaptive TTL without a Redis round-trip;
+        # deltas are synced to the shared access_count:* keys every ACCESS_FLUSH_EVERY accesses.
+        # Each entry is [access count, monotonic time first seen]
+        self._access_lfu: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._access_deltas: Counter = Counter()
+        self._access_pending = 0
+        self._access_lock = threading.Lock()
+
+        # Syncs run on a background thread (started once Redis is reachable, stopped by
+        # close()) so callers never wait on the INCRBY pipeline
+        self._access_queue: "queue.Queue[Optional[Counter]]" = queue.Queue()
+        self._access_thread = None
+
+        # zstd contexts are reusable but not thread-safe: one pair per thread
+        self._zstd_local = threading.local()
+
+        if HAS_MSGSPEC:
+            # Reused across calls; msgspec encoders/decoders are cheap to call but not to build
+            self._msgpack_encoder = msgspec.msgpack.Encoder()
+            self._msgpack_decoder = msgspec.msgpack.Decoder()
+
         try:
             # Create connection pool for better concurrency
             pool = ConnectionPool(
@@ -131,7 +495,13 @@ class RAGCacheManagerOptimized:
             # Test connection
             self.redis.ping()
             logger.info(f"Redis connection pool established: {redis_host}:{redis_port} (db={redis_db}, pool_size={max_connections})")
-            logger.info(f"Optimizations: compression={'LZ4' if HAS_LZ4 else 'disabled'}, serialization={'msgpack' if HAS_MSGPACK else 'pickle'}, adaptive_ttl={enable_adaptive_ttl}")
+            logger.info(f"Optimizations: compression={COMPRESSION}, serialization={SERIALIZATION}, adaptive_ttl={enable_adaptive_ttl}")
+
+            if enable_adaptive_ttl:
+                self._access_thread = threading.Thread(
+                    target=self._access_flush_worker, name="cache-access-flush", daemon=True
+                )
+                self._access_thread.start()
 
         except redis.ConnectionError as e:
             logger.warning(f"Redis connection failed: {e}. Caching disabled.")
@@ -151,105 +521,239 @@ class RAGCacheManagerOptimized:
             'response_hits': 0,
             'response_misses': 0,
             'compression_bytes_saved': 0,
+            'admission_rejects': 0,
+            'l0_hits': 0,
+            'shm_hits': 0,
             'avg_cache_operation_ms': 0.0,
             'total_operations': 0
         }
+        self._stats_lock = threading.Lock()
+
+    # Cache keys are built as bytes: redis-py sends them as-is instead of encoding str keys
 
-    def _hash_query(self, query: str) -> str:
+    def _hash_query(self, query: str) -> bytes:
         """Create consistent hash for query text"""
-        return hashlib.md5(query.encode('utf-8')).hexdigest()
+        return _hash_text(query)
 
-    def _hash_embedding(self, embedding: np.ndarray) -> str:
-        """Create hash for embedding vector"""
-        return hashlib.md5(embedding.tobytes()).hexdigest()
+    def _hash_embedding(self, embedding: np.ndarray) -> bytes:
+        """Create hash for embedding vector (float32 bytes, so dtype doesn't change the key)"""
+        # Hash the array buffer in place; only non-float32 or strided input is copied
+        return _hexdigest(memoryview(np.ascontiguousarray(embedding, dtype=np.float32)).cast('B'))
+
+    def _embedding_key(self, query: str) -> bytes:
+        """Build the embedding cache key for a query"""
+        return b'emb:' + self._hash_query(query)
+
+    def _retrieval_key(self, embedding: np.ndarray, technology_filter: Optional[str]) -> bytes:
+        """Build the retrieval cache key for an embedding"""
+        return b'ret:%s:%s' % (self._hash_embedding(embedding), _filter_part(technology_filter))
+
+    def _response_key(self, query: str, technology_filter: Optional[str], top_k: int) -> bytes:
+        """Build the response cache key for a query"""
+        return b'%s%s:%s:%d' % (self._response_prefix, self._hash_query(query), _filter_part(technology_filter), top_k)
 
     def _is_cache_available(self) -> bool:
         """Check if Redis is available"""
         return self.redis is not None
 
     def _serialize(self, data: Any) -> bytes:
-        """Serialize data using msgpack (if available) or pickle"""
-        if HAS_MSGPACK:
-            # Handle numpy arrays
-            if isinstance(data, np.ndarray):
-                data = {'_numpy': True, 'data': data.tolist(), 'dtype': str(data.dtype), 'shape': data.shape}
-            return msgpack.packb(data, use_bin_type=True)
-        else:
+        """Serialize data using msgspec or msgpack (if available), else pickle"""
+        if not (HAS_MSGSPEC or HAS_MSGPACK):
             return pickle.dumps(data)
 
+        # Handle numpy arrays: raw buffer as one msgpack bin field, no per-element boxing
+        if isinstance(data, np.ndarray):
+            data = {'_np': True, 'd': data.dtype.str, 's': list(data.shape), 'b': data.tobytes()}
+        if HAS_MSGSPEC:
+            return self._msgpack_encoder.encode(data)
+        return msgpack.packb(data, use_bin_type=True)
+
     def _deserialize(self, data: bytes) -> Any:
-        """Deserialize data using msgpack (if available) or pickle"""
-        if HAS_MSGPACK:
-            obj = msgpack.unpackb(data, raw=False)
-            # Restore numpy arrays
-            if isinstance(obj, dict) and obj.get('_numpy'):
-                return np.array(obj['data'], dtype=obj['dtype']).reshape(obj['shape'])
-            return obj
-        else:
+        """Deserialize data using msgspec or msgpack (if available), else pickle"""
+        if not (HAS_MSGSPEC or HAS_MSGPACK):
             return pickle.loads(data)
 
-    def _compress(self, data: bytes) -> Tuple[bytes, bool]:
+        if HAS_MSGSPEC:
+            obj = self._msgpack_decoder.decode(data)
+        else:
+            obj = msgpack.unpackb(data, raw=False)
+
+        # Restore numpy arrays (read-only view over the cached buffer)
+        if isinstance(obj, dict) and obj.get('_np'):
+            return np.frombuffer(obj['b'], dtype=obj['d']).reshape(obj['s'])
+        if isinstance(obj, dict) and obj.get('_numpy'):
+            # Entries written before the raw-buffer format
+            return np.array(obj['data'], dtype=obj['dtype']).reshape(obj['shape'])
+        return obj
+
+    def _serialize_embedding(self, embedding: np.ndarray) -> bytes:
+        """Serialize an embedding at the configured storage precision"""
+        framed = _pack_embedding(embedding, self.embedding_precision)
+        return framed if framed is not None else self._serialize(embedding)
+
+    def _deserialize_embedding(self, data: bytes) -> np.ndarray:
+        """Deserialize an embedding frame, or a generically serialized array"""
+        if data[0] == EMBED_MAGIC:
+            return _unpack_embedding(data)
+        return self._deserialize(data)
+
+    def _zstd(self) -> Tuple["zstandard.ZstdCompressor", "zstandard.ZstdDecompressor"]:
+        """This thread's zstd compressor/decompressor pair"""
+        local = self._zstd_local
+        if not hasattr(local, 'contexts'):
+            local.contexts = (zstandard.ZstdCompressor(level=ZSTD_LEVEL), zstandard.ZstdDecompressor())
+        return local.contexts
+
+    def _compress(self, data: bytes) -> Tuple[bytes, int]:
         """
         Compress data if it exceeds threshold and compression is available
 
+        Uses zstd level 1 or, without zstandard, a raw LZ4 block (size-prefixed,
+        no frame header or checksum) since cache payloads are mostly sub-KB.
+
         Returns:
-            (data, was_compressed): Tuple of data and compression flag
+            (data, codec): Tuple of data and the CODEC_* id it was compressed with
         """
-        if HAS_LZ4 and len(data) > self.compression_threshold:
-            compressed = lz4.frame.compress(data)
+        if len(data) > self.compression_threshold:
+            if HAS_ZSTD:
+                compressed, codec = self._zstd()[0].compress(data), CODEC_ZSTD
+            elif HAS_LZ4:
+                compressed, codec = lz4.block.compress(data, mode='fast', acceleration=1), CODEC_LZ4_BLOCK
+            else:
+                return data, CODEC_NONE
+
             # Only use compression if it actually reduces size
             if len(compressed) < len(data):
                 self.stats['compression_bytes_saved'] += (len(data) - len(compressed))
-                return compressed, True
-        return data, False
-
-    def _decompress(self, data: bytes, was_compressed: bool) -> bytes:
-        """Decompress data if it was compressed"""
-        if was_compressed and HAS_LZ4:
+                return compressed, codec
+        return data, CODEC_NONE
+
+    def _decompress(self, data: bytes, codec: int) -> bytes:
+        """Decompress data written with the given CODEC_* id"""
+        if codec == CODEC_ZSTD:
+            return self._zstd()[1].decompress(data)
+        if codec == CODEC_LZ4_BLOCK:
+            return lz4.block.decompress(data)
+        if codec == CODEC_LZ4_FRAME:
             return lz4.frame.decompress(data)
         return data
 
-    def _get_adaptive_ttl(self, base_ttl: int, key: str) -> int:
+    def _encode_entry(self, serialized: bytes) -> bytes:
+        """Compress a serialized payload (if beneficial) into the stored cache entry"""
+        if serialized[0] == EMBED_MAGIC and serialized[1] in _EMBED_UNCOMPRESSED:
+            return serialized
+        compressed, codec = self._compress(serialized)
+        if codec == CODEC_LZ4_BLOCK:
+            return _LZ4_BLOCK_PREFIX + compressed
+        return compressed
+
+    def _decode_entry(self, cached: bytes) -> bytes:
+        """Recover the serialized payload from a stored cache entry"""
+        if cached[:4] == ZSTD_MAGIC:
+            return self._decompress(cached, CODEC_ZSTD)
+        if cached[0] <= CODEC_ZSTD:
+            # Codec-prefixed entry; memoryview skips the prefix without copying
+            return self._decompress(memoryview(cached)[1:], cached[0])
+        return cached
+
+    def _get_adaptive_ttl(self, base_ttl: int, key: bytes) -> int:
         """
         Calculate adaptive TTL based on access frequency
 
-        Popular items get longer TTL (up to 2x base)
+        Entries are rewritten on each miss, so each write restarts the key's timer.
+        By the Che approximation, a key requested at rate λ is hit with probability
+        1 - exp(-λT) under timer T. Solve that for T at target_hit_rate, clamped to
+        [base_ttl, ADAPTIVE_TTL_MAX_FACTOR * base_ttl].
         """
         if not self.enable_adaptive_ttl or not self._is_cache_available():
             return base_ttl
 
-        try:
-            # Check how often this key has been accessed
-            access_key = f"access_count:{key}"
-            access_count = self.redis.get(access_key)
-
-            if access_count:
-                count = int(access_count)
-                # Increase TTL by up to 2x based on access frequency
-                # 10+ accesses = 2x TTL, 5-9 accesses = 1.5x, <5 = 1x
-                if count >= 10:
-                    return base_ttl * 2
-                elif count >= 5:
-                    return int(base_ttl * 1.5)
-
-            return base_ttl
-        except Exception:
+        # Local view of the key's request history, no round-trip
+        entry = self._access_lfu.get(key)
+        if entry is None:
             return base_ttl
 
-    def _record_access(self, key: str):
+        count, first_seen = entry
+        rate = count / max(time.monotonic() - first_seen, 1.0)
+        ttl = -math.log(1 - self.target_hit_rate) / rate
+
+        return int(min(max(ttl, base_ttl), base_ttl * ADAPTIVE_TTL_MAX_FACTOR))
+
+    def _record_access(self, key: bytes):
         """Record access for adaptive TTL calculation"""
-        if not self.enable_adaptive_ttl or not self._is_cache_available():
+        if not self.enable_adaptive_ttl:
             return
 
+        with self._access_lock:
+            entry = self._access_lfu.get(key)
+            if entry is None:
+                self._access_lfu[key] = [1, time.monotonic()]
+            else:
+                entry[0] += 1
+                self._access_lfu.move_to_end(key)
+            if len(self._access_lfu) > ACCESS_LFU_SIZE:
+                self._access_lfu.popitem(last=False)
+
+            self._access_deltas[key] += 1
+            self._access_pending += 1
+            if self._access_pending < ACCESS_FLUSH_EVERY:
+                return
+            deltas, self._access_deltas = self._access_deltas, Counter()
+            self._access_pending = 0
+
+        self._access_queue.put(deltas)
+
+    def _access_flush_worker(self):
+        """Drain queued access deltas into Redis, merging any backlog into one pipeline"""
+        while True:
+            deltas = self._access_queue.get()
+            if deltas is _ACCESS_FLUSH_STOP:
+                return
+            stop = False
+            try:
+                while not stop:
+                    more = self._access_queue.get_nowait()
+                    if more is _ACCESS_FLUSH_STOP:
+                        stop = True
+                    else:
+                        deltas.update(more)
+            except queue.Empty:
+                pass
+            if self._is_cache_available():
+                self._flush_access_counts(deltas)
+            if stop:
+                return
+
+    def _flush_access_counts(self, deltas: Counter):
+        """Add local access deltas to the shared Redis counters and adopt their totals"""
         try:
-            access_key = f"access_count:{key}"
-            pipe = self.redis.pipeline()
-            pipe.incr(access_key)
-            pipe.expire(access_key, 86400)  # Reset count daily
-            pipe.execute()
+            pipe = self.redis.pipeline(transaction=False)
+            for key, delta in deltas.items():
+                access_key = b'access_count:' + key
+                pipe.incrby(access_key, delta)
+                pipe.expire(access_key, ACCESS_COUNT_TTL)
+            totals = pipe.execute()[::2]
+
+            # Totals include other workers' accesses to the same keys
+            with self._access_lock:
+                for key, total in zip(deltas, totals):
+                    entry = self._access_lfu.get(key)
+                    if entry is not None:
+                        entry[0] = max(entry[0], total)
         except Exception:
             pass  # Non-critical, don't fail the operation
 
+    def _get_and_record_access(self, key: bytes) -> Optional[bytes]:
+        """
+        GET a cache key and record the access for adaptive TTL
+
+        Misses count as accesses too, so a key that keeps being requested
+        earns a longer TTL when it is next written.
+        """
+        cached = self.redis.get(key)
+        self._record_access(key)
+        return cached
+
     def _retry_operation(self, operation, *args, **kwargs):
         """Retry operation on transient failures"""
         for attempt in range(self.retry_attempts):
@@ -271,30 +775,44 @@ class RAGCacheManagerOptimized:
         if not self._is_cache_available():
             return None
 
-        query_hash = self._hash_query(query)
-        cache_key = f"emb:{query_hash}"
+        cache_key = self._embedding_key(query)
+
+        if self._l0 is not None:
+            embedding = self._l0.get(cache_key)
+            if embedding is not None:
+                self._record_access(cache_key)
+                self.stats['embedding_hits'] += 1
+                self.stats['l0_hits'] += 1
+                return embedding
+
+        if self._shm is not None:
+            embedding = self._shm.get(self._hash_query(query))
+            if embedding is not None:
+                self._record_access(cache_key)
+                self.stats['embedding_hits'] += 1
+                self.stats['shm_hits'] += 1
+                if self._l0 is not None:
+                    embedding.flags.writeable = False
+                    self._l0.put(cache_key, embedding)
+                return embedding
 
         try:
-            start_time = time.time()
+            start_ns = self._start_timing()
 
-            cached = self._retry_operation(self.redis.get, cache_key)
+            cached = self._retry_operation(self._get_and_record_access, cache_key)
             if cached:
                 self.stats['embedding_hits'] += 1
-                self._record_access(cache_key)
 
-                # Check if data was compressed (first byte flag)
-                was_compressed = cached[0] == 1 if len(cached) > 0 else False
-                if was_compressed:
-                    cached = cached[1:]  # Remove compression flag
-                    cached = self._decompress(cached, True)
-                else:
-                    cached = cached[1:]  # Remove flag
+                embedding = self._deserialize_embedding(self._decode_entry(cached))
+                if self._shm is not None:
+                    self._shm.put(self._hash_query(query), embedding, self.embedding_ttl)
+                if self._l0 is not None:
+                    # Shared between callers from now on, so make sure nobody can modify it
+                    embedding.flags.writeable = False
+                    self._l0.put(cache_key, embedding)
 
-                embedding = self._deserialize(cached)
-
-                elapsed_ms = (time.time() - start_time) * 1000
-                self._update_performance_stats(elapsed_ms)
-                logger.debug(f"Embedding cache HIT for query: {query[:50]}... ({elapsed_ms:.2f}ms)")
+                self._update_performance_stats(start_ns)
+                logger.debug(f"Embedding cache HIT for query: {query[:50]}...")
 
                 return embedding
             else:
@@ -312,32 +830,36 @@ class RAGCacheManagerOptimized:
         if not self._is_cache_available():
             return
 
-        query_hash = self._hash_query(query)
-        cache_key = f"emb:{query_hash}"
+        if self._admission is not None and not self._admission.check_and_add(self._hash_query(query)):
+            # First sighting: remember the query, cache it if it comes back
+            self.stats['admission_rejects'] += 1
+            return
+
+        cache_key = self._embedding_key(query)
 
         try:
-            start_time = time.time()
+            start_ns = self._start_timing()
 
             # Serialize
-            serialized = self._serialize(embedding)
+            serialized = self._serialize_embedding(embedding)
 
             # Compress if beneficial
-            compressed, was_compressed = self._compress(serialized)
-
-            # Add compression flag (1 byte: 1 = compressed, 0 = not compressed)
-            data = bytes([1 if was_compressed else 0]) + compressed
+            data = self._encode_entry(serialized)
 
             # Calculate adaptive TTL
             ttl = self._get_adaptive_ttl(self.embedding_ttl, cache_key)
 
             # Cache with TTL
             self._retry_operation(self.redis.setex, cache_key, ttl, data)
+            if self._l0 is not None:
+                self._l0.discard(cache_key)
+            if self._shm is not None:
+                self._shm.put(self._hash_query(query), embedding, ttl)
 
-            elapsed_ms = (time.time() - start_time) * 1000
-            self._update_performance_stats(elapsed_ms)
+            self._update_performance_stats(start_ns)
 
-            size_info = f", compressed {len(serialized)}→{len(compressed)} bytes" if was_compressed else ""
-            logger.debug(f"Cached embedding for query: {query[:50]}... (TTL={ttl}s{size_info}, {elapsed_ms:.2f}ms)")
+            size_info = f", compressed {len(serialized)}→{len(data)} bytes" if len(data) < len(serialized) else ""
+            logger.debug(f"Cached embedding for query: {query[:50]}... (TTL={ttl}s{size_info})")
         except Exception as e:
             logger.error(f"Error caching embedding: {e}")
 
@@ -352,25 +874,19 @@ class RAGCacheManagerOptimized:
         if not self._is_cache_available():
             return None
 
-        embedding_hash = self._hash_embedding(embedding)
-        filter_suffix = f":{technology_filter}" if technology_filter else ":none"
-        cache_key = f"ret:{embedding_hash}{filter_suffix}"
+        cache_key = self._retrieval_key(embedding, technology_filter)
 
         try:
-            start_time = time.time()
+            start_ns = self._start_timing()
 
-            cached = self._retry_operation(self.redis.get, cache_key)
+            cached = self._retry_operation(self._get_and_record_access, cache_key)
             if cached:
                 self.stats['retrieval_hits'] += 1
-                self._record_access(cache_key)
 
-                was_compressed = cached[0] == 1
-                cached = self._decompress(cached[1:], was_compressed)
-                results = self._deserialize(cached)
+                results = self._deserialize(self._decode_entry(cached))
 
-                elapsed_ms = (time.time() - start_time) * 1000
-                self._update_performance_stats(elapsed_ms)
-                logger.debug(f"Retrieval cache HIT (semantic match, {elapsed_ms:.2f}ms)")
+                self._update_performance_stats(start_ns)
+                logger.debug("Retrieval cache HIT (semantic match)")
 
                 return results
             else:
@@ -391,23 +907,19 @@ class RAGCacheManagerOptimized:
         if not self._is_cache_available():
             return
 
-        embedding_hash = self._hash_embedding(embedding)
-        filter_suffix = f":{technology_filter}" if technology_filter else ":none"
-        cache_key = f"ret:{embedding_hash}{filter_suffix}"
+        cache_key = self._retrieval_key(embedding, technology_filter)
 
         try:
-            start_time = time.time()
+            start_ns = self._start_timing()
 
             serialized = self._serialize(results)
-            compressed, was_compressed = self._compress(serialized)
-            data = bytes([1 if was_compressed else 0]) + compressed
+            data = self._encode_entry(serialized)
 
             ttl = self._get_adaptive_ttl(self.retrieval_ttl, cache_key)
             self._retry_operation(self.redis.setex, cache_key, ttl, data)
 
-            elapsed_ms = (time.time() - start_time) * 1000
-            self._update_performance_stats(elapsed_ms)
-            logger.debug(f"Cached retrieval results (TTL={ttl}s, {elapsed_ms:.2f}ms)")
+            self._update_performance_stats(start_ns)
+            logger.debug(f"Cached retrieval results (TTL={ttl}s)")
         except Exception as e:
             logger.error(f"Error caching retrieval results: {e}")
 
@@ -423,24 +935,20 @@ class RAGCacheManagerOptimized:
         if not self._is_cache_available():
             return None
 
-        query_hash = self._hash_query(query)
-        filter_part = technology_filter if technology_filter else "none"
-        cache_key = f"resp:{query_hash}:{filter_part}:{top_k}"
+        cache_key = self._response_key(query, technology_filter, top_k)
 
         try:
-            start_time = time.time()
+            start_ns = self._start_timing()
 
-            cached = self._retry_operation(self.redis.get, cache_key)
+            cached = self._retry_operation(self._get_and_record_access, cache_key)
             if cached:
                 self.stats['response_hits'] += 1
-                self._record_access(cache_key)
 
                 # Responses use JSON, no compression flag needed
-                response = json.loads(cached)
+                response = _loads_response(cached)
 
-                elapsed_ms = (time.time() - start_time) * 1000
-                self._update_performance_stats(elapsed_ms)
-                logger.info(f"Response cache HIT for query: {query[:50]}... ({elapsed_ms:.2f}ms)")
+                self._update_performance_stats(start_ns)
+                logger.info(f"Response cache HIT for query: {query[:50]}...")
 
                 return response
             else:
@@ -462,22 +970,19 @@ class RAGCacheManagerOptimized:
         if not self._is_cache_available():
             return
 
-        query_hash = self._hash_query(query)
-        filter_part = technology_filter if technology_filter else "none"
-        cache_key = f"resp:{query_hash}:{filter_part}:{top_k}"
+        cache_key = self._response_key(query, technology_filter, top_k)
 
         try:
-            start_time = time.time()
+            start_ns = self._start_timing()
 
             # Use JSON for responses (human-readable)
-            data = json.dumps(response)
+            data = _dumps_response(response)
 
             ttl = self._get_adaptive_ttl(self.response_ttl, cache_key)
             self._retry_operation(self.redis.setex, cache_key, ttl, data)
 
-            elapsed_ms = (time.time() - start_time) * 1000
-            self._update_performance_stats(elapsed_ms)
-            logger.info(f"Cached response for query: {query[:50]}... (TTL={ttl}s, {elapsed_ms:.2f}ms)")
+            self._update_performance_stats(start_ns)
+            logger.info(f"Cached response for query: {query[:50]}... (TTL={ttl}s)")
         except Exception as e:
             logger.error(f"Error caching response: {e}")
 
@@ -497,32 +1002,162 @@ class RAGCacheManagerOptimized:
             pipe = self.redis.pipeline()
 
             for query, embedding in queries_embeddings:
-                query_hash = self._hash_query(query)
-                cache_key = f"emb:{query_hash}"
+                cache_key = self._embedding_key(query)
 
-                serialized = self._serialize(embedding)
-                compressed, was_compressed = self._compress(serialized)
-                data = bytes([1 if was_compressed else 0]) + compressed
+                serialized = self._serialize_embedding(embedding)
+                data = self._encode_entry(serialized)
 
                 ttl = self._get_adaptive_ttl(self.embedding_ttl, cache_key)
                 pipe.setex(cache_key, ttl, data)
+                if self._l0 is not None:
+                    self._l0.discard(cache_key)
+                if self._shm is not None:
+                    self._shm.put(self._hash_query(query), embedding, ttl)
 
             pipe.execute()
             logger.info(f"Batch cached {len(queries_embeddings)} embeddings")
         except Exception as e:
             logger.error(f"Error in batch embedding cache: {e}")
 
-    # ===== CACHE MANAGEMENT =====
+    def get_batch_cached_embeddings(self, queries: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Retrieve multiple cached embeddings, fetching local misses with a single MGET
+
+        Args:
+            queries: Query texts to look up
+
+        Returns:
+            Embeddings in query order, None for each miss
+        """
+        if not self._is_cache_available() or not queries:
+            return [None] * len(queries)
+
+        cache_keys = [self._embedding_key(query) for query in queries]
+        embeddings: List[Optional[np.ndarray]] = [None] * len(queries)
+
+        # Same lookup order as get_cached_embedding: in-process L0, shared memory, then Redis
+        missing = []
+        for i, cache_key in enumerate(cache_keys):
+            embedding = self._l0.get(cache_key) if self._l0 is not None else None
+            if embedding is not None:
+                self.stats['l0_hits'] += 1
+            elif self._shm is not None:
+                embedding = self._shm.get(self._hash_query(queries[i]))
+                if embedding is not None:
+                    self.stats['shm_hits'] += 1
+                    if self._l0 is not None:
+                        embedding.flags.writeable = False
+                        self._l0.put(cache_key, embedding)
+            if embedding is None:
+                missing.append(i)
+                continue
+            self._record_access(cache_key)
+            self.stats['embedding_hits'] += 1
+            embeddings[i] = embedding
+        if not missing:
+            return embeddings
+
+        try:
+            start_ns = self._start_timing()
+
+            cached_entries = self._retry_operation(self.redis.mget, [cache_keys[i] for i in missing])
+
+            for i, cached in zip(missing, cached_entries):
+                cache_key = cache_keys[i]
+                self._record_access(cache_key)
+                if cached:
+                    self.stats['embedding_hits'] += 1
+                    embedding = self._deserialize_embedding(self._decode_entry(cached))
+                    if self._shm is not None:
+                        self._shm.put(self._hash_query(queries[i]), embedding, self.embedding_ttl)
+                    if self._l0 is not None:
+                        embedding.flags.writeable = False
+                        self._l0.put(cache_key, embedding)
+                    embeddings[i] = embedding
+                else:
+                    self.stats['embedding_misses'] += 1
 
-    def _update_performance_stats(self, elapsed_ms: float):
-        """Update average cache operation time"""
-        total_ops = self.stats['total_operations']
-        current_avg = self.stats['avg_cache_operation_ms']
+            self._update_performance_stats(start_ns)
+            hits = sum(embedding is not None for embedding in embeddings)
+            logger.debug(f"Batch embedding lookup: {hits}/{len(queries)} hits")
 
-        # Rolling average
-        new_avg = (current_avg * total_ops + elapsed_ms) / (total_ops + 1)
-        self.stats['avg_cache_operation_ms'] = new_avg
-        self.stats['total_operations'] += 1
+            return embeddings
+        except Exception as e:
+            logger.error(f"Error in batch embedding lookup: {e}")
+            self.stats['embedding_misses'] += len(missing)
+            for i in missing:
+                embeddings[i] = None
+            return embeddings
+
+    # ===== ASYNC API =====
+    # Each call runs its sync counterpart on a worker thread (the connection pool is
+    # thread-safe), so the event loop stays free and lookups can overlap via asyncio.gather.
+
+    async def get_cached_embedding_async(self, query: str) -> Optional[np.ndarray]:
+        return await asyncio.to_thread(self.get_cached_embedding, query)
+
+    async def cache_embedding_async(self, query: str, embedding: np.ndarray):
+        await asyncio.to_thread(self.cache_embedding, query, embedding)
+
+    async def get_cached_retrieval_async(
+        self,
+        embedding: np.ndarray,
+        technology_filter: Optional[str] = None
+    ) -> Optional[Dict]:
+        return await asyncio.to_thread(self.get_cached_retrieval, embedding, technology_filter)
+
+    async def cache_retrieval_async(
+        self,
+        embedding: np.ndarray,
+        results: Dict,
+        technology_filter: Optional[str] = None
+    ):
+        await asyncio.to_thread(self.cache_retrieval, embedding, results, technology_filter)
+
+    async def get_cached_response_async(
+        self,
+        query: str,
+        technology_filter: Optional[str] = None,
+        top_k: int = 5
+    ) -> Optional[Dict]:
+        return await asyncio.to_thread(self.get_cached_response, query, technology_filter, top_k)
+
+    async def cache_response_async(
+        self,
+        query: str,
+        response: Dict,
+        technology_filter: Optional[str] = None,
+        top_k: int = 5
+    ):
+        await asyncio.to_thread(self.cache_response, query, response, technology_filter, top_k)
+
+    async def get_batch_cached_embeddings_async(self, queries: List[str]) -> List[Optional[np.ndarray]]:
+        return await asyncio.to_thread(self.get_batch_cached_embeddings, queries)
+
+    # ===== CACHE MANAGEMENT =====
+
+    def _start_timing(self) -> Optional[int]:
+        """Start timestamp for 1 in TIMING_SAMPLE_EVERY cache operations, None for the rest"""
+        # Unlocked read: a race only samples an operation more or less
+        if self.stats['total_operations'] % TIMING_SAMPLE_EVERY:
+            return None
+        return time.perf_counter_ns()
+
+    def _update_performance_stats(self, start_ns: Optional[int]):
+        """Count a cache operation and, if it was sampled, fold its latency into the average"""
+        elapsed_ms = (time.perf_counter_ns() - start_ns) / 1e6 if start_ns is not None else None
+        with self._stats_lock:
+            self.stats['total_operations'] += 1
+            if elapsed_ms is None:
+                return
+
+            # Exponentially weighted average of the sampled operations, so recent
+            # latency keeps moving it however long the process runs
+            current_avg = self.stats['avg_cache_operation_ms']
+            if current_avg == 0.0:
+                self.stats['avg_cache_operation_ms'] = elapsed_ms
+            else:
+                self.stats['avg_cache_operation_ms'] = current_avg + LATENCY_EWMA_ALPHA * (elapsed_ms - current_avg)
 
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache performance statistics with optimization metrics"""
@@ -562,15 +1197,60 @@ class RAGCacheManagerOptimized:
                 ])
             },
             'optimizations': {
-                'compression_enabled': HAS_LZ4,
+                'compression_enabled': HAS_ZSTD or HAS_LZ4,
+                'compression': COMPRESSION,
                 'compression_bytes_saved': self.stats['compression_bytes_saved'],
-                'serialization': 'msgpack' if HAS_MSGPACK else 'pickle',
+                'serialization': SERIALIZATION,
                 'adaptive_ttl': self.enable_adaptive_ttl,
+                'admission_filter': self._admission is not None,
+                'admission_rejects': self.stats['admission_rejects'],
+                'l0_cache': self._l0 is not None,
+                'l0_hits': self.stats['l0_hits'],
+                'shared_memory': self._shm is not None,
+                'shm_hits': self.stats['shm_hits'],
                 'avg_cache_operation_ms': round(self.stats['avg_cache_operation_ms'], 3),
                 'total_operations': self.stats['total_operations']
             }
         }
 
+    def _scan_keys(self, pattern: str):
+        """Iterate keys matching pattern with SCAN (non-blocking, unlike KEYS)"""
+        return self.redis.scan_iter(match=pattern, count=SCAN_BATCH_SIZE)
+
+    def _unlink_matching(self, pattern: str) -> int:
+        """UNLINK keys matching pattern in batches; memory is freed by Redis in the background"""
+        cleared = 0
+        batch = []
+        for key in self._scan_keys(pattern):
+            batch.append(key)
+            if len(batch) >= SCAN_BATCH_SIZE:
+                self.redis.unlink(*batch)
+                cleared += len(batch)
+                batch = []
+        if batch:
+            self.redis.unlink(*batch)
+            cleared += len(batch)
+        return cleared
+
+    def close(self):
+        """
+        Flush pending access counts, stop the background worker and release the
+        Redis connection pool. The manager behaves as if Redis were down afterwards.
+        """
+        if self._access_thread is not None:
+            with self._access_lock:
+                deltas, self._access_deltas = self._access_deltas, Counter()
+                self._access_pending = 0
+            if deltas:
+                self._access_queue.put(deltas)
+            self._access_queue.put(_ACCESS_FLUSH_STOP)
+            self._access_thread.join()
+            self._access_thread = None
+
+        if self.redis is not None:
+            self.redis.connection_pool.disconnect()
+            self.redis = None
+
     def clear_cache(self, cache_type: Optional[str] = None):
         """Clear cache (use with caution)"""
         if not self._is_cache_available():
@@ -582,27 +1262,27 @@ class RAGCacheManagerOptimized:
             'response': 'resp:*'
         }
 
+        if self._l0 is not None and cache_type in (None, 'embedding'):
+            self._l0.clear()
+        if self._shm is not None and cache_type in (None, 'embedding'):
+            self._shm.clear()
+
         if cache_type:
             if cache_type in patterns:
-                pattern = patterns[cache_type]
-                keys = self.redis.keys(pattern)
-                if keys:
-                    self.redis.delete(*keys)
-                logger.info(f"Cleared {len(keys)} keys from {cache_type} cache")
+                cleared = self._unlink_matching(patterns[cache_type])
+                logger.info(f"Cleared {cleared} keys from {cache_type} cache")
         else:
             # Clear all RAG cache keys
             total_cleared = 0
             for pattern in patterns.values():
-                keys = self.redis.keys(pattern)
-                if keys:
-                    self.redis.delete(*keys)
-                    total_cleared += len(keys)
+                total_cleared += self._unlink_matching(pattern)
 
             # Also clear access counters
-            access_keys = self.redis.keys('access_count:*')
-            if access_keys:
-                self.redis.delete(*access_keys)
-                total_cleared += len(access_keys)
+            with self._access_lock:
+                self._access_lfu.clear()
+                self._access_deltas.clear()
+                self._access_pending = 0
+            total_cleared += self._unlink_matching('access_count:*')
 
             logger.info(f"Cleared all RAG cache ({total_cleared} keys)")
 
@@ -612,9 +1292,9 @@ class RAGCacheManagerOptimized:
             return {'embedding': 0, 'retrieval': 0, 'response': 0}
 
         return {
-            'embedding': len(self.redis.keys('emb:*')),
-            'retrieval': len(self.redis.keys('ret:*')),
-            'response': len(self.redis.keys('resp:*'))
+            'embedding': sum(1 for _ in self._scan_keys('emb:*')),
+            'retrieval': sum(1 for _ in self._scan_keys('ret:*')),
+            'response': sum(1 for _ in self._scan_keys('resp:*'))
         }
 
     def warm_cache(self, common_queries: List[Tuple[str, str, int]]):
@@ -12,16 +12,259 @@ Performance gain: ~100x faster for cache hits (<1ms vs 6ms)
 
 import redis
 import pickle
+import functools
 import hashlib
 import json
 import logging
-from typing import Optional, Dict, Any, List
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 import numpy as np
 from datetime import timedelta
 
+try:
+    import lz4.block
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+QUERY_HASH_CACHE_SIZE = 8192  # Recent query text -> hash mappings kept in process
+SEMANTIC_INDEX_SIZE = 4096  # Cached retrieval embeddings searchable in process (oldest overwritten)
+SCAN_COUNT = 1000  # Keys per SCAN step when clearing or sizing the cache
+DELETE_BATCH_SIZE = 500  # Keys per pipelined delete in clear_cache
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Embedding entries: 8-byte header (magic, dtype code, ndim, length) + raw vector bytes.
+# Anything else (entries from earlier versions, non-1-D arrays) is a pickle.
+_VEC_MAGIC = b'EMB1'
+_VEC_HEADER = struct.Struct('<4sBBH')
+_VEC_DTYPES = {1: np.dtype('<f4'), 2: np.dtype('<f8'), 3: np.dtype('<f2')}
+_VEC_CODES = {dtype: code for code, dtype in _VEC_DTYPES.items()}
+
+
+def _dumps_json(obj: Any) -> bytes:
+    """Encode a response as JSON bytes (orjson also accepts numpy values)"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _loads_json(data: bytes) -> Any:
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
+
+
+@functools.lru_cache(maxsize=QUERY_HASH_CACHE_SIZE)
+def _hash_query_text(query: str) -> str:
+    """Create consistent hash for query text (xxh3-128 when available, MD5 otherwise)"""
+    data = query.encode('utf-8')
+    if HAS_XXHASH:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.md5(data).hexdigest()
+
+
+def _pack_vec(arr: np.ndarray) -> bytes:
+    """Serialize an embedding as header + raw bytes (pickle for unsupported arrays)"""
+    code = _VEC_CODES.get(arr.dtype.newbyteorder('<'))
+    if code is None or arr.ndim != 1 or arr.shape[0] > 0xFFFF:
+        return pickle.dumps(arr)
+    data = np.ascontiguousarray(arr, dtype=_VEC_DTYPES[code])
+    return _VEC_HEADER.pack(_VEC_MAGIC, code, 1, arr.shape[0]) + data.tobytes()
+
+
+# Retrieval entries: one tag byte + payload. Untagged entries are plain pickles
+# (protocol 2+ always starts with 0x80), as written by earlier versions.
+_RET_LZ4 = 0x01  # LZ4 block of a plain pickle (read only)
+_RET_OOB = 0x02  # Out-of-band pickle frame
+_RET_OOB_LZ4 = 0x03  # LZ4 block of an out-of-band pickle frame
+_FRAME_LEN = struct.Struct('<I')
+
+
+def _dumps(obj: Any) -> bytes:
+    """
+    Pickle with protocol 5, keeping array buffers out of band
+
+    Frame: [len][main pickle] then [len][buffer] for each buffer, so numpy
+    arrays are copied once into the frame instead of through the pickle stream.
+    """
+    buffers = []
+    main = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    parts = [_FRAME_LEN.pack(len(main)), main]
+    for buffer in buffers:
+        raw = buffer.raw()
+        parts += [_FRAME_LEN.pack(raw.nbytes), raw]
+    return b''.join(parts)
+
+
+def _loads(frame) -> Any:
+    """Load a frame written by _dumps; arrays are views over the frame"""
+    view = memoryview(frame)
+    (main_len,) = _FRAME_LEN.unpack_from(view)
+    pos = _FRAME_LEN.size + main_len
+    main = view[_FRAME_LEN.size:pos]
+    buffers = []
+    while pos < len(view):
+        (buffer_len,) = _FRAME_LEN.unpack_from(view, pos)
+        pos += _FRAME_LEN.size
+        buffers.append(view[pos:pos + buffer_len])
+        pos += buffer_len
+    return pickle.loads(main, buffers=buffers)
+
+
+def _pack_results(results: Dict) -> bytes:
+    """Pickle retrieval results out of band, LZ4-compressed when lz4 is installed"""
+    frame = _dumps(results)
+    if HAS_LZ4:
+        return bytes([_RET_OOB_LZ4]) + lz4.block.compress(frame)
+    return bytes([_RET_OOB]) + frame
+
+
+def _unpack_results(buf: bytes) -> Dict:
+    """Load retrieval results in any of the stored formats"""
+    tag = buf[0]
+    if tag == _RET_OOB_LZ4:
+        return _loads(lz4.block.decompress(memoryview(buf)[1:]))
+    if tag == _RET_OOB:
+        return _loads(memoryview(buf)[1:])
+    if tag == _RET_LZ4:
+        return pickle.loads(lz4.block.decompress(memoryview(buf)[1:]))
+    return pickle.loads(buf)
+
+
+# Per-query hash q:{query_hash} holds the embedding (field 'emb') and responses
+# (fields 'resp:{filter}:{top_k}'). Redis expires whole keys, so each field value
+# starts with its own expiry time and expired fields read as misses.
+_FIELD_EXPIRY = struct.Struct('<d')
+
+
+def _stamp_field(data: bytes, ttl: int) -> bytes:
+    """Prefix a hash field value with its expiry time"""
+    return _FIELD_EXPIRY.pack(time.time() + ttl) + data
+
+
+def _unstamp_field(buf: Optional[bytes]) -> Tuple[Optional[bytes], float]:
+    """
+    Strip the expiry prefix from a hash field value
+
+    Returns (data, expires_at); data is None when the field is missing or expired.
+    """
+    if not buf:
+        return None, 0.0
+    (expires_at,) = _FIELD_EXPIRY.unpack_from(buf)
+    if expires_at < time.time():
+        return None, expires_at
+    return buf[_FIELD_EXPIRY.size:], expires_at
+
+
+def _unpack_vec(buf: bytes) -> np.ndarray:
+    """Deserialize an embedding entry; raw entries are a read-only view over buf"""
+    if buf[:4] != _VEC_MAGIC:
+        return pickle.loads(buf)
+    _, code, _, length = _VEC_HEADER.unpack_from(buf)
+    return np.frombuffer(buf, dtype=_VEC_DTYPES[code], count=length, offset=_VEC_HEADER.size)
+
+
+class _TTLCache:
+    """Thread-safe in-process LRU whose entries also expire after ttl seconds"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, expires_at: Optional[float] = None):
+        """Store value for ttl seconds, or until expires_at (wall-clock) if that is sooner"""
+        ttl = self.ttl if expires_at is None else min(self.ttl, expires_at - time.time())
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _SemanticIndex:
+    """
+    Fixed-capacity matrix of normalized retrieval embeddings for cosine lookup
+
+    Rows are overwritten oldest-first once full. A search is one matrix-vector
+    product over the filled rows (~0.3 ms for 4096 x 384 float32).
+    """
+
+    def __init__(self, capacity: int = SEMANTIC_INDEX_SIZE):
+        self.capacity = capacity
+        self._vectors: Optional[np.ndarray] = None
+        self._keys: List[Optional[str]] = [None] * capacity
+        self._filters = np.zeros(capacity, dtype=np.int32)  # Filter ids, see _filter_ids
+        self._filter_ids: Dict[str, int] = {}
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def add(self, embedding: np.ndarray, key: str, filter_part: str):
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            elif vector.shape[0] != self._vectors.shape[1]:
+                return
+            row = self._next
+            self._vectors[row] = vector
+            self._keys[row] = key
+            self._filters[row] = self._filter_ids.setdefault(filter_part, len(self._filter_ids))
+            self._next = (row + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def nearest(self, embedding: np.ndarray, filter_part: str) -> Tuple[Optional[str], float]:
+        """Return the cache key and cosine similarity of the closest entry with this filter"""
+        vector = self._normalize(embedding)
+        with self._lock:
+            filter_id = self._filter_ids.get(filter_part)
+            if vector is None or filter_id is None or vector.shape[0] != self._vectors.shape[1]:
+                return None, 0.0
+            similarities = self._vectors[:self._size] @ vector
+            similarities[self._filters[:self._size] != filter_id] = -np.inf
+            row = int(np.argmax(similarities))
+            return self._keys[row], float(similarities[row])
+
 
 class RAGCacheManager:
     """
@@ -30,7 +273,7 @@ class RAGCacheManager:
     Level 1: Embedding Cache
       - Caches computed embeddings by query text hash
       - TTL: 1 hour
-      - Key format: emb:{query_hash}
+      - Key format: q:{query_hash}, field emb
 
     Level 2: Retrieval Cache (Semantic)
       - Caches vector search results by embedding similarity
@@ -41,7 +284,11 @@ class RAGCacheManager:
     Level 3: Response Cache
       - Caches complete formatted responses
       - TTL: 24 hours
-      - Key format: resp:{query_hash}:{filter}:{top_k}
+      - Key format: q:{query_hash}, field resp:{filter}:{top_k}
+
+    Embedding and response entries for a query share one small hash, so a single
+    HMGET reads both. The hash expires after the longest TTL; shorter per-field
+    TTLs are enforced on read.
     """
 
     def __init__(
@@ -52,7 +299,10 @@ class RAGCacheManager:
         embedding_ttl: int = 3600,  # 1 hour
         retrieval_ttl: int = 21600,  # 6 hours
         response_ttl: int = 86400,  # 24 hours
-        similarity_threshold: float = 0.95  # For semantic cache matching
+        similarity_threshold: float = 0.95,  # For semantic cache matching
+        pool_size: int = 32,  # Connections shared by concurrent callers
+        l1_embedding_size: int = 1024,  # In-process embeddings kept ahead of Redis
+        l1_response_size: int = 256  # In-process responses kept ahead of Redis
     ):
         """
         Initialize Redis caching layer
@@ -65,14 +315,22 @@ class RAGCacheManager:
             retrieval_ttl: Retrieval cache TTL in seconds
             response_ttl: Response cache TTL in seconds
             similarity_threshold: Minimum similarity for semantic cache hit
+            pool_size: Maximum pooled Redis connections (callers wait for a free one)
+            l1_embedding_size: Embeddings kept in process in front of Redis
+            l1_response_size: Responses kept in process in front of Redis
         """
+        # Blocking pool: concurrent callers reuse warm sockets and wait (up to
+        # timeout) for a free connection instead of failing when the pool is full
+        self._pool = redis.BlockingConnectionPool(
+            host=redis_host,
+            port=redis_port,
+            db=redis_db,
+            max_connections=pool_size,
+            timeout=2.0,
+            decode_responses=False  # We use pickle for binary data
+        )
         try:
-            self.redis = redis.Redis(
-                host=redis_host,
-                port=redis_port,
-                db=redis_db,
-                decode_responses=False  # We use pickle for binary data
-            )
+            self.redis = redis.Redis(connection_pool=self._pool)
             # Test connection
             self.redis.ping()
             logger.info(f"Redis connection established: {redis_host}:{redis_port} (db={redis_db})")
@@ -84,6 +342,15 @@ class RAGCacheManager:
         self.retrieval_ttl = retrieval_ttl
         self.response_ttl = response_ttl
         self.similarity_threshold = similarity_threshold
+        self._query_ttl = max(embedding_ttl, response_ttl)
+
+        # In-process L1 caches: embeddings as read-only arrays, responses as their
+        # JSON bytes so every hit decodes a fresh dict the caller is free to modify
+        self._l1_emb = _TTLCache(l1_embedding_size, embedding_ttl)
+        self._l1_resp = _TTLCache(l1_response_size, response_ttl)
+
+        # Embeddings of cached retrievals, so near-identical queries share an entry
+        self._semantic_index = _SemanticIndex()
 
         # Statistics tracking
         self.stats = {
@@ -95,14 +362,59 @@ class RAGCacheManager:
             'response_misses': 0
         }
 
-    def _hash_query(self, query: str) -> str:
-        """Create consistent hash for query text"""
-        return hashlib.md5(query.encode('utf-8')).hexdigest()
+        if self.redis is None:
+            self._disable_cache_methods()
+
+    def _disable_cache_methods(self):
+        """Replace the lookup/store methods with no-ops (Redis is unavailable for this instance)"""
+        def miss(*args, **kwargs):
+            return None
+
+        def empty_bundle(*args, **kwargs):
+            return {'response': None, 'embedding': None, 'retrieval': None}
+
+        self.get_cached_embedding = miss
+        self.cache_embedding = miss
+        self.get_cached_retrieval = miss
+        self.cache_retrieval = miss
+        self.get_cached_response = miss
+        self.cache_response = miss
+        self.get_cached_bundle = empty_bundle
+        self.cache_all = miss
+
+    def close(self):
+        """Close all pooled Redis connections"""
+        self._pool.disconnect()
+        self.redis = None
+
+    # Depends only on the text, so repeated queries reuse a memoized hash
+    _hash_query = staticmethod(_hash_query_text)
 
     def _hash_embedding(self, embedding: np.ndarray) -> str:
-        """Create hash for embedding vector"""
-        # Convert to bytes for hashing
-        return hashlib.md5(embedding.tobytes()).hexdigest()
+        """Create hash for embedding vector (xxh3-128 when available, 128-bit BLAKE2b otherwise)"""
+        # Hash the array's buffer in place instead of copying it out with tobytes()
+        data = memoryview(np.ascontiguousarray(embedding)).cast('B')
+        if HAS_XXHASH:
+            return xxhash.xxh3_128_hexdigest(data)
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def _remember_embedding(self, query_hash: str, embedding: np.ndarray, expires_at: Optional[float] = None):
+        """Keep an embedding in the L1 cache (read-only, since hits share it)"""
+        embedding.flags.writeable = False
+        self._l1_emb.set(query_hash, embedding, expires_at)
+
+    def _retrieval_key(self, embedding: np.ndarray, technology_filter: Optional[str]) -> str:
+        """
+        Resolve the retrieval cache key for an embedding
+
+        Uses the key of the most similar cached embedding (same filter) when its
+        cosine similarity reaches similarity_threshold, else the embedding's own key.
+        """
+        filter_part = technology_filter if technology_filter else "none"
+        key, similarity = self._semantic_index.nearest(embedding, filter_part)
+        if key is not None and similarity >= self.similarity_threshold:
+            return key
+        return f"ret:{self._hash_embedding(embedding)}:{filter_part}"
 
     def _is_cache_available(self) -> bool:
         """Check if Redis is available"""
@@ -124,14 +436,20 @@ class RAGCacheManager:
             return None
 
         query_hash = self._hash_query(query)
-        cache_key = f"emb:{query_hash}"
+
+        embedding = self._l1_emb.get(query_hash)
+        if embedding is not None:
+            self.stats['embedding_hits'] += 1
+            return embedding
 
         try:
-            cached = self.redis.get(cache_key)
+            cached, expires_at = _unstamp_field(self.redis.hget(f"q:{query_hash}", 'emb'))
             if cached:
                 self.stats['embedding_hits'] += 1
                 logger.debug(f"Embedding cache HIT for query: {query[:50]}...")
-                return pickle.loads(cached)
+                embedding = _unpack_vec(cached)
+                self._remember_embedding(query_hash, embedding, expires_at)
+                return embedding
             else:
                 self.stats['embedding_misses'] += 1
                 return None
@@ -151,14 +469,14 @@ class RAGCacheManager:
             return
 
         query_hash = self._hash_query(query)
-        cache_key = f"emb:{query_hash}"
+        cache_key = f"q:{query_hash}"
 
         try:
-            self.redis.setex(
-                cache_key,
-                self.embedding_ttl,
-                pickle.dumps(embedding)
-            )
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(cache_key, 'emb', _stamp_field(_pack_vec(embedding), self.embedding_ttl))
+            pipe.expire(cache_key, self._query_ttl)
+            pipe.execute()
+            self._remember_embedding(query_hash, np.array(embedding))
             logger.debug(f"Cached embedding for query: {query[:50]}...")
         except Exception as e:
             logger.error(f"Error caching embedding: {e}")
@@ -186,16 +504,14 @@ class RAGCacheManager:
         if not self._is_cache_available():
             return None
 
-        embedding_hash = self._hash_embedding(embedding)
-        filter_suffix = f":{technology_filter}" if technology_filter else ":none"
-        cache_key = f"ret:{embedding_hash}{filter_suffix}"
+        cache_key = self._retrieval_key(embedding, technology_filter)
 
         try:
             cached = self.redis.get(cache_key)
             if cached:
                 self.stats['retrieval_hits'] += 1
                 logger.debug(f"Retrieval cache HIT (semantic match)")
-                return pickle.loads(cached)
+                return _unpack_results(cached)
             else:
                 self.stats['retrieval_misses'] += 1
                 return None
@@ -220,16 +536,16 @@ class RAGCacheManager:
         if not self._is_cache_available():
             return
 
-        embedding_hash = self._hash_embedding(embedding)
-        filter_suffix = f":{technology_filter}" if technology_filter else ":none"
-        cache_key = f"ret:{embedding_hash}{filter_suffix}"
+        filter_part = technology_filter if technology_filter else "none"
+        cache_key = f"ret:{self._hash_embedding(embedding)}:{filter_part}"
 
         try:
             self.redis.setex(
                 cache_key,
                 self.retrieval_ttl,
-                pickle.dumps(results)
+                _pack_results(results)
             )
+            self._semantic_index.add(embedding, cache_key, filter_part)
             logger.debug(f"Cached retrieval results")
         except Exception as e:
             logger.error(f"Error caching retrieval results: {e}")
@@ -258,14 +574,21 @@ class RAGCacheManager:
 
         query_hash = self._hash_query(query)
         filter_part = technology_filter if technology_filter else "none"
-        cache_key = f"resp:{query_hash}:{filter_part}:{top_k}"
+        field = f"resp:{filter_part}:{top_k}"
+        cache_key = f"q:{query_hash}:{field}"
+
+        cached = self._l1_resp.get(cache_key)
+        if cached is not None:
+            self.stats['response_hits'] += 1
+            return _loads_json(cached)
 
         try:
-            cached = self.redis.get(cache_key)
+            cached, expires_at = _unstamp_field(self.redis.hget(f"q:{query_hash}", field))
             if cached:
                 self.stats['response_hits'] += 1
                 logger.info(f"Response cache HIT for query: {query[:50]}...")
-                return json.loads(cached)
+                self._l1_resp.set(cache_key, cached, expires_at)
+                return _loads_json(cached)
             else:
                 self.stats['response_misses'] += 1
                 return None
@@ -294,18 +617,149 @@ class RAGCacheManager:
 
         query_hash = self._hash_query(query)
         filter_part = technology_filter if technology_filter else "none"
-        cache_key = f"resp:{query_hash}:{filter_part}:{top_k}"
+        field = f"resp:{filter_part}:{top_k}"
 
         try:
-            self.redis.setex(
-                cache_key,
-                self.response_ttl,
-                json.dumps(response)
-            )
+            data = _dumps_json(response)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(f"q:{query_hash}", field, _stamp_field(data, self.response_ttl))
+            pipe.expire(f"q:{query_hash}", self._query_ttl)
+            pipe.execute()
+            self._l1_resp.set(f"q:{query_hash}:{field}", data)
             logger.info(f"Cached response for query: {query[:50]}...")
         except Exception as e:
             logger.error(f"Error caching response: {e}")
 
+    # ===== COMBINED LOOKUP =====
+
+    def get_cached_bundle(
+        self,
+        query: str,
+        embedding: Optional[np.ndarray] = None,
+        technology_filter: Optional[str] = None,
+        top_k: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Check all cache levels for a query in a single round trip
+
+        The response and embedding are read with one HMGET on the query's hash
+        (pipelined with the retrieval GET when an embedding is given). Levels are
+        decoded in priority order: a response hit is returned on its own;
+        otherwise the embedding and retrieval entries are decoded.
+
+        Args:
+            query: Query text
+            embedding: Query embedding, if already known (enables the retrieval lookup)
+            technology_filter: Technology filter
+            top_k: Number of results
+
+        Returns:
+            Dictionary with 'response', 'embedding' and 'retrieval' (None when missed)
+        """
+        bundle = {'response': None, 'embedding': None, 'retrieval': None}
+        if not self._is_cache_available():
+            return bundle
+
+        query_hash = self._hash_query(query)
+        filter_part = technology_filter if technology_filter else "none"
+        field = f"resp:{filter_part}:{top_k}"
+        l1_key = f"q:{query_hash}:{field}"
+
+        cached_response = self._l1_resp.get(l1_key)
+        if cached_response is not None:
+            self.stats['response_hits'] += 1
+            bundle['response'] = _loads_json(cached_response)
+            return bundle
+
+        try:
+            if embedding is None:
+                cached_fields = self.redis.hmget(f"q:{query_hash}", [field, 'emb'])
+                cached_retrieval = None
+            else:
+                pipe = self.redis.pipeline(transaction=False)
+                pipe.hmget(f"q:{query_hash}", [field, 'emb'])
+                pipe.get(self._retrieval_key(embedding, technology_filter))
+                cached_fields, cached_retrieval = pipe.execute()
+        except Exception as e:
+            logger.error(f"Error reading cache bundle: {e}")
+            return bundle
+
+        try:
+            cached_response, expires_at = _unstamp_field(cached_fields[0])
+            if cached_response:
+                self.stats['response_hits'] += 1
+                logger.info(f"Response cache HIT for query: {query[:50]}...")
+                self._l1_resp.set(l1_key, cached_response, expires_at)
+                bundle['response'] = _loads_json(cached_response)
+                return bundle
+            self.stats['response_misses'] += 1
+
+            cached_embedding, expires_at = _unstamp_field(cached_fields[1])
+            if cached_embedding:
+                self.stats['embedding_hits'] += 1
+                bundle['embedding'] = _unpack_vec(cached_embedding)
+                self._remember_embedding(query_hash, bundle['embedding'], expires_at)
+            else:
+                self.stats['embedding_misses'] += 1
+
+            if embedding is not None:
+                if cached_retrieval:
+                    self.stats['retrieval_hits'] += 1
+                    bundle['retrieval'] = _unpack_results(cached_retrieval)
+                else:
+                    self.stats['retrieval_misses'] += 1
+        except Exception as e:
+            logger.error(f"Error decoding cache bundle: {e}")
+
+        return bundle
+
+    def cache_all(
+        self,
+        query: str,
+        embedding: np.ndarray,
+        results: Dict,
+        response: Dict,
+        technology_filter: Optional[str] = None,
+        top_k: int = 5
+    ):
+        """
+        Cache the embedding, retrieval results and response for a query in one round trip
+
+        Args:
+            query: Query text
+            embedding: Query embedding
+            results: Vector search results
+            response: Formatted response dictionary
+            technology_filter: Technology filter used
+            top_k: Number of results
+        """
+        if not self._is_cache_available():
+            return
+
+        query_hash = self._hash_query(query)
+        filter_part = technology_filter if technology_filter else "none"
+        query_key = f"q:{query_hash}"
+        field = f"resp:{filter_part}:{top_k}"
+        ret_key = f"ret:{self._hash_embedding(embedding)}:{filter_part}"
+
+        try:
+            response_data = _dumps_json(response)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(query_key, mapping={
+                'emb': _stamp_field(_pack_vec(embedding), self.embedding_ttl),
+                field: _stamp_field(response_data, self.response_ttl)
+            })
+            pipe.expire(query_key, self._query_ttl)
+            pipe.setex(ret_key, self.retrieval_ttl, _pack_results(results))
+            pipe.execute()
+
+            self._remember_embedding(query_hash, np.array(embedding))
+            self._semantic_index.add(embedding, ret_key, filter_part)
+            self._l1_resp.set(f"{query_key}:{field}", response_data)
+            logger.info(f"Cached embedding, retrieval and response for query: {query[:50]}...")
+        except Exception as e:
+            logger.error(f"Error caching query results: {e}")
+
     # ===== CACHE MANAGEMENT =====
 
     def get_cache_stats(self) -> Dict[str, Any]:
@@ -352,6 +806,51 @@ class RAGCacheManager:
             }
         }
 
+    def _delete_matching(self, pattern: str) -> int:
+        """Delete keys matching pattern via SCAN (non-blocking, unlike KEYS)"""
+        deleted = 0
+        pipe = self.redis.pipeline(transaction=False)
+        for key in self.redis.scan_iter(match=pattern, count=SCAN_COUNT):
+            pipe.delete(key)
+            deleted += 1
+            if deleted % DELETE_BATCH_SIZE == 0:
+                pipe.execute()
+        pipe.execute()
+        return deleted
+
+    def _count_matching(self, pattern: str) -> int:
+        """Count keys matching pattern via SCAN"""
+        return sum(1 for _ in self.redis.scan_iter(match=pattern, count=SCAN_COUNT))
+
+    def _query_fields(self):
+        """Yield (key, field names) for every per-query hash, fetched in pipelined batches"""
+        keys = []
+        for key in self.redis.scan_iter(match='q:*', count=SCAN_COUNT):
+            keys.append(key)
+            if len(keys) == DELETE_BATCH_SIZE:
+                yield from self._hkeys_batch(keys)
+                keys = []
+        if keys:
+            yield from self._hkeys_batch(keys)
+
+    def _hkeys_batch(self, keys: List[bytes]):
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.hkeys(key)
+        return zip(keys, pipe.execute())
+
+    def _delete_query_fields(self, embedding: bool) -> int:
+        """Delete the embedding (or all response) fields from every per-query hash"""
+        deleted = 0
+        pipe = self.redis.pipeline(transaction=False)
+        for key, fields in self._query_fields():
+            matching = [f for f in fields if (f == b'emb') == embedding]
+            if matching:
+                pipe.hdel(key, *matching)
+                deleted += len(matching)
+        pipe.execute()
+        return deleted
+
     def clear_cache(self, cache_type: Optional[str] = None):
         """
         Clear cache (use with caution)
@@ -362,25 +861,21 @@ class RAGCacheManager:
         if not self._is_cache_available():
             return
 
-        patterns = {
-            'embedding': 'emb:*',
-            'retrieval': 'ret:*',
-            'response': 'resp:*'
-        }
-
-        if cache_type:
-            if cache_type in patterns:
-                pattern = patterns[cache_type]
-                keys = self.redis.keys(pattern)
-                if keys:
-                    self.redis.delete(*keys)
-                logger.info(f"Cleared {len(keys)} keys from {cache_type} cache")
-        else:
-            # Clear all RAG cache keys
-            for pattern in patterns.values():
-                keys = self.redis.keys(pattern)
-                if keys:
-                    self.redis.delete(*keys)
+        if cache_type in (None, 'embedding'):
+            self._l1_emb.clear()
+        if cache_type in (None, 'response'):
+            self._l1_resp.clear()
+
+        if cache_type in ('embedding', 'response'):
+            deleted = self._delete_query_fields(embedding=cache_type == 'embedding')
+            logger.info(f"Cleared {deleted} entries from {cache_type} cache")
+        elif cache_type == 'retrieval':
+            deleted = self._delete_matching('ret:*')
+            logger.info(f"Cleared {deleted} keys from {cache_type} cache")
+        elif cache_type is None:
+            # Clear all RAG cache keys (emb:* and resp:* are from earlier versions)
+            for pattern in ('q:*', 'ret:*', 'emb:*', 'resp:*'):
+                self._delete_matching(pattern)
             logger.info(f"Cleared all RAG cache")
 
     def get_cache_size(self) -> Dict[str, int]:
@@ -393,10 +888,19 @@ class RAGCacheManager:
         if not self._is_cache_available():
             return {'embedding': 0, 'retrieval': 0, 'response': 0}
 
+        embedding_count = 0
+        response_count = 0
+        for _, fields in self._query_fields():
+            for field in fields:
+                if field == b'emb':
+                    embedding_count += 1
+                else:
+                    response_count += 1
+
         return {
-            'embedding': len(self.redis.keys('emb:*')),
-            'retrieval': len(self.redis.keys('ret:*')),
-            'response': len(self.redis.keys('resp:*'))
+            'embedding': embedding_count,
+            'retrieval': self._count_matching('ret:*'),
+            'response': response_count
         }
 
 
@@ -434,16 +938,14 @@ if __name__ == "__main__":
 
     start = time.time()
 
-    # Check response cache (miss expected)
-    cached_response = cache.get_cached_response(query, technology_filter="React Docs")
-    if not cached_response:
-        # Check embedding cache (miss expected)
-        cached_embedding = cache.get_cached_embedding(query)
-        if not cached_embedding:
+    # Check response and embedding caches in one round trip (misses expected)
+    bundle = cache.get_cached_bundle(query, technology_filter="React Docs")
+    if not bundle['response']:
+        cached_embedding = bundle['embedding']
+        if cached_embedding is None:
             # Generate embedding
             embedding = model.encode([query])[0]
-            cache.cache_embedding(query, embedding)
-            print("  - Generated and cached embedding")
+            print("  - Generated embedding")
         else:
             embedding = cached_embedding
             print("  - Used cached embedding")
@@ -455,17 +957,15 @@ if __name__ == "__main__":
             "distances": [[0.15]]
         }
 
-        cache.cache_retrieval(embedding, results, technology_filter="React Docs")
-        print("  - Cached retrieval results")
-
         # Format response
         response = {
             "query": query,
             "results": [{"content": "Example...", "similarity": 0.85}]
         }
 
-        cache.cache_response(query, response, technology_filter="React Docs")
-        print("  - Cached complete response")
+        # Write all three levels in one round trip
+        cache.cache_all(query, embedding, results, response, technology_filter="React Docs")
+        print("  - Cached embedding, retrieval results and response")
 
     elapsed_first = (time.time() - start) * 1000
     print(f"\nFirst query time: {elapsed_first:.2f}ms")
@@ -1,5 +1,7 @@
 import chromadb
+from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
+import torch
 import logging
 import time
 from opentelemetry import trace, metrics
@@ -13,11 +15,29 @@ except ImportError:
         print("Warning: telemetry_setup.py not found. Telemetry will not be initialized.")
         pass
 
+try:
+    from caching_layer import RAGCacheManager
+    CACHING_ENABLED = True
+except ImportError:
+    CACHING_ENABLED = False
+
 # --- Configuration ---
 CHROMA_HOST = 'localhost'
 CHROMA_PORT = '8001'
+CHROMA_KEEPALIVE_SECS = 60  # Keep idle HTTP connections to ChromaDB open between queries
+CHROMA_MAX_KEEPALIVE_CONNECTIONS = 16
 COLLECTION_NAME = 'coding_knowledge'
 EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+ENCODE_BATCH_SIZE = 32  # Queries per forward pass in query_batch
+REDIS_HOST = 'localhost'
+REDIS_PORT = 6379
+REDIS_DB = 2  # Dedicated DB for the RAG cache
+CACHE_NAMESPACE = 'tool'  # Keeps this tool's responses apart from the MCP server's in the same DB
+
+# Metric attribute sets, built once instead of on every query
+_ATTR_FILTER_USED = {"filter.used": "True"}
+_ATTR_FILTER_UNUSED = {"filter.used": "False"}
+_ATTR_BATCH = {"batch": True}
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -57,19 +77,51 @@ class CodingKnowledgeTool:
 
         logging.info("Initializing CodingKnowledgeTool to connect to ChromaDB server...")
         try:
-            self.db_client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+            # One persistent HTTP connection pool, so queries skip the TCP handshake
+            self.db_client = chromadb.HttpClient(
+                host=CHROMA_HOST,
+                port=CHROMA_PORT,
+                settings=Settings(
+                    chroma_http_keepalive_secs=CHROMA_KEEPALIVE_SECS,
+                    chroma_http_max_keepalive_connections=CHROMA_MAX_KEEPALIVE_CONNECTIONS
+                )
+            )
             self.collection = self.db_client.get_collection(name=COLLECTION_NAME)
             self.embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+            # Run the model on GPU in half precision when available
+            if torch.cuda.is_available():
+                self.embedding_model = self.embedding_model.to('cuda')
+                self.embedding_model.half()
+                logging.info(f"Embedding model loaded on GPU (fp16): {torch.cuda.get_device_name(0)}")
+            else:
+                logging.info("Embedding model loaded on CPU")
             
-            # Register the main query function as a tool for the agent
+            # Register the query functions as tools for the agent
             mcp.tool(name='query_knowledge_base')(self.query)
+            mcp.tool(name='query_knowledge_base_batch')(self.query_batch)
             
-            logging.info("CodingKnowledgeTool initialized and 'query_knowledge_base' tool registered.")
+            logging.info("CodingKnowledgeTool initialized and 'query_knowledge_base' tools registered.")
         except Exception as e:
             logging.error(f"Failed to initialize CodingKnowledgeTool or connect to ChromaDB server: {e}")
             logging.error(f"Please ensure the ChromaDB server is running and accessible at {CHROMA_HOST}:{CHROMA_PORT}.")
             raise
 
+        # Embedding and response cache; the tool works without it
+        self.cache = None
+        if CACHING_ENABLED:
+            try:
+                self.cache = RAGCacheManager(
+                    redis_host=REDIS_HOST,
+                    redis_port=REDIS_PORT,
+                    redis_db=REDIS_DB,
+                    response_namespace=CACHE_NAMESPACE
+                )
+            except Exception as e:
+                logging.warning(f"Failed to initialize cache manager: {e}. Running without cache.")
+        else:
+            logging.warning("Caching layer not available. Running without cache.")
+
     def query(self, query: str, n_results: int = 5, technology_filter: str = None) -> str:
         """
         Queries the coding knowledge base for relevant documents and code snippets.
@@ -86,20 +138,41 @@ class CodingKnowledgeTool:
         with self.tracer.start_as_current_span("rag.query") as span:
             start_time = time.time()
             
-            # Add attributes to the span for observability
-            span.set_attribute("rag.query.text", query)
-            span.set_attribute("rag.query.n_results", n_results)
-            if technology_filter:
-                span.set_attribute("rag.filter.technology", technology_filter)
+            # Add attributes to the span for observability (skipped when not sampled)
+            recording = span.is_recording()
+            if recording:
+                span.set_attribute("rag.query.text", query)
+                span.set_attribute("rag.query.n_results", n_results)
+                if technology_filter:
+                    span.set_attribute("rag.filter.technology", technology_filter)
 
             # Increment the total query counter
-            self.query_counter.add(1, {"filter.used": str(bool(technology_filter))})
+            self.query_counter.add(1, _ATTR_FILTER_USED if technology_filter else _ATTR_FILTER_UNUSED)
 
             logging.info(f"Received query: '{query}' with filter: '{technology_filter}'")
             
             try:
-                # 1. Create the query embedding
-                query_embedding = self.embedding_model.encode(query).tolist()
+                # 0. Format the cached results for a repeated query
+                if self.cache:
+                    cached_response = self.cache.get_cached_response(query, technology_filter, n_results)
+                    if cached_response is not None:
+                        if recording:
+                            span.set_attribute("rag.cache.hit", "response")
+                        return self._format_results(cached_response['documents'], cached_response['metadatas'])
+
+                # 1. Create the query embedding (cached by query text). It stays a
+                #    numpy array: ChromaDB accepts ndarrays, so no list conversion.
+                query_embedding = self.cache.get_cached_embedding(query) if self.cache else None
+                if query_embedding is None:
+                    query_embedding = self.embedding_model.encode(
+                        query,
+                        convert_to_numpy=True,
+                        normalize_embeddings=True
+                    )
+                    if self.cache:
+                        self.cache.cache_embedding(query, query_embedding)
+                elif recording:
+                    span.set_attribute("rag.cache.hit", "embedding")
 
                 # 2. Construct the metadata filter if provided
                 where_filter = {}
@@ -115,27 +188,23 @@ class CodingKnowledgeTool:
                 )
 
                 # 4. Format and return the results
-                context_str = """--- Retrieved Knowledge Base Context ---
-
-"""
                 if not results or not results.get('documents') or not results['documents'][0]:
-                    span.set_attribute("rag.results.found", False)
+                    if recording:
+                        span.set_attribute("rag.results.found", False)
                     self.no_results_counter.add(1)
                     return "No relevant documents found in the knowledge base."
 
-                span.set_attribute("rag.results.found", True)
-                span.set_attribute("rag.results.count", len(results['documents'][0]))
+                if recording:
+                    span.set_attribute("rag.results.found", True)
+                    span.set_attribute("rag.results.count", len(results['documents'][0]))
 
-                for i, doc in enumerate(results['documents'][0]):
-                    metadata = results['metadatas'][0][i]
-                    source_file = metadata.get('source_file', 'Unknown')
-                    tech = metadata.get('technology', 'General')
-                    
-                    context_str += f"--- Result {i+1} | Technology: {tech} | Source: {source_file} ---\n"
-                    context_str += doc + "\n\n"
-                
-                context_str += "--- End of Retrieved Context ---"
-                return context_str
+                documents, metadatas = results['documents'][0], results['metadatas'][0]
+                if self.cache:
+                    # Cache the results rather than the string, so the formatting can change
+                    self.cache.cache_response(
+                        query, {'documents': documents, 'metadatas': metadatas}, technology_filter, n_results
+                    )
+                return self._format_results(documents, metadatas)
 
             except Exception as e:
                 logging.error(f"An error occurred during the query: {e}")
@@ -148,6 +217,127 @@ class CodingKnowledgeTool:
                 duration_ms = (time.time() - start_time) * 1000
                 self.query_latency_histogram.record(duration_ms)
 
+    def query_batch(self, queries: list, n_results: int = 5, technology_filter: str = None) -> list:
+        """
+        Queries the coding knowledge base for several questions at once.
+
+        Uncached queries are encoded in one batched model call and sent to ChromaDB
+        as a single query, which is much faster than calling query() for each one.
+
+        Args:
+            queries (list): The questions or topics to search for.
+            n_results (int): The maximum number of results to return per query.
+            technology_filter (str, optional): A specific technology to filter every search by.
+
+        Returns:
+            list: One formatted context string per query, in the same order.
+        """
+        with self.tracer.start_as_current_span("rag.query_batch") as span:
+            start_time = time.time()
+
+            if span.is_recording():
+                span.set_attribute("rag.query.batch_size", len(queries))
+                span.set_attribute("rag.query.n_results", n_results)
+                if technology_filter:
+                    span.set_attribute("rag.filter.technology", technology_filter)
+
+            self.query_counter.add(len(queries), _ATTR_FILTER_USED if technology_filter else _ATTR_FILTER_UNUSED)
+
+            logging.info(f"Received batch of {len(queries)} queries with filter: '{technology_filter}'")
+
+            try:
+                responses = [None] * len(queries)
+
+                # 1. Format cached results, then collect embeddings for the rest
+                if self.cache:
+                    for i, query in enumerate(queries):
+                        cached_response = self.cache.get_cached_response(query, technology_filter, n_results)
+                        if cached_response is not None:
+                            responses[i] = self._format_results(cached_response['documents'], cached_response['metadatas'])
+                pending = [i for i, response in enumerate(responses) if response is None]
+                if not pending:
+                    return responses
+
+                pending_queries = [queries[i] for i in pending]
+                if self.cache:
+                    embeddings = self.cache.get_batch_cached_embeddings(pending_queries)
+                else:
+                    embeddings = [None] * len(pending)
+
+                # 2. Encode every uncached query in one batched call
+                to_encode = [j for j, embedding in enumerate(embeddings) if embedding is None]
+                if to_encode:
+                    encoded = self.embedding_model.encode(
+                        [pending_queries[j] for j in to_encode],
+                        batch_size=ENCODE_BATCH_SIZE,
+                        convert_to_numpy=True,
+                        normalize_embeddings=True
+                    )
+                    for j, embedding in zip(to_encode, encoded):
+                        embeddings[j] = embedding
+                    if self.cache:
+                        self.cache.cache_batch_embeddings([(pending_queries[j], embeddings[j]) for j in to_encode])
+
+                # 3. Query the vector database once for all pending queries
+                results = self.collection.query(
+                    query_embeddings=embeddings,
+                    n_results=n_results,
+                    where={"technology": technology_filter} if technology_filter else None
+                )
+
+                # 4. Format the results per query
+                for j, i in enumerate(pending):
+                    documents = results['documents'][j] if results and results.get('documents') else []
+                    if not documents:
+                        self.no_results_counter.add(1)
+                        responses[i] = "No relevant documents found in the knowledge base."
+                        continue
+                    metadatas = results['metadatas'][j]
+                    responses[i] = self._format_results(documents, metadatas)
+                    if self.cache:
+                        self.cache.cache_response(
+                            queries[i], {'documents': documents, 'metadatas': metadatas}, technology_filter, n_results
+                        )
+                return responses
+
+            except Exception as e:
+                logging.error(f"An error occurred during the batch query: {e}")
+                span.record_exception(e)
+                span.set_status(trace.Status(trace.StatusCode.ERROR, description=str(e)))
+                return [f"Error: Could not query the knowledge base. Details: {e}"] * len(queries)
+
+            finally:
+                duration_ms = (time.time() - start_time) * 1000
+                self.query_latency_histogram.record(duration_ms, _ATTR_BATCH)
+
+    def close(self):
+        """
+        Releases the ChromaDB connection pool and the cache. Call on tool teardown.
+        """
+        # The HTTP pool is owned by the client and closed when it is released
+        self.collection = None
+        self.db_client = None
+        if self.cache:
+            self.cache.close()
+        self.cache = None
+        logging.info("CodingKnowledgeTool closed.")
+
+    @staticmethod
+    def _format_results(documents: list, metadatas: list) -> str:
+        """Formats one query's retrieved documents as a context string."""
+        parts = ["--- Retrieved Knowledge Base Context ---\n\n"]
+        for i, doc in enumerate(documents):
+            metadata = metadatas[i]
+            source_file = metadata.get('source_file', 'Unknown')
+            tech = metadata.get('technology', 'General')
+
+            parts.append(f"--- Result {i+1} | Technology: {tech} | Source: {source_file} ---\n")
+            parts.append(doc)
+            parts.append("\n\n")
+
+        parts.append("--- End of Retrieved Context ---")
+        return ''.join(parts)
+
 
 # --- Example Usage ---
 if __name__ == '__main__':
@@ -186,3 +376,11 @@ if __name__ == '__main__':
     no_results_query = "asdfghjkl"
     no_results = knowledge_tool.query(no_results_query)
     print(no_results)
+
+    # --- Test Case 4: Batched Queries ---
+    print("\n--- Test Case 4: Batch of queries in one call ---")
+    batch_results = knowledge_tool.query_batch([general_query, filtered_query, "How do I define a Python dataclass?"])
+    for result in batch_results:
+        print(result)
+
+    knowledge_tool.close()
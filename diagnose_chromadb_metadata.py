@@ -6,10 +6,11 @@ what metadata fields are available and their values, so we can fix the
 filtering logic in EnhancedRAGAgent.
 """
 
+import asyncio
 import chromadb
 import json
 
-def diagnose_chromadb():
+async def diagnose_chromadb():
     """Examine ChromaDB metadata structure and content"""
 
     print("=" * 80)
@@ -18,14 +19,14 @@ def diagnose_chromadb():
 
     try:
         # Connect to ChromaDB
-        client = chromadb.HttpClient(host="localhost", port=8001)
-        collection = client.get_collection("coding_knowledge")
+        client = await chromadb.AsyncHttpClient(host="localhost", port=8001)
+        collection = await client.get_collection("coding_knowledge")
 
         print(f"\n✓ Connected to ChromaDB at localhost:8001")
         print(f"✓ Collection: coding_knowledge")
 
         # Get collection count
-        count = collection.count()
+        count = await collection.count()
         print(f"✓ Total chunks in collection: {count}")
 
         # Retrieve a sample of chunks to inspect metadata
@@ -33,7 +34,7 @@ def diagnose_chromadb():
         print("SAMPLE CHUNKS (First 5)")
         print("=" * 80)
 
-        results = collection.get(limit=5, include=["documents", "metadatas"])
+        results = await collection.get(limit=5, include=["documents", "metadatas"])
 
         if results and results["metadatas"]:
             for i, (doc, metadata) in enumerate(zip(results["documents"], results["metadatas"]), 1):
@@ -50,7 +51,7 @@ def diagnose_chromadb():
         print("QUERY RESULT STRUCTURE")
         print("=" * 80)
 
-        query_results = collection.query(
+        query_results = await collection.query(
             query_texts=["How do I use React?"],
             n_results=3,
             include=["documents", "metadatas", "distances"]
@@ -117,21 +118,28 @@ def diagnose_chromadb():
                     "filter": {"source_file": {"$regex": ".*"}}
                 })
 
-            # Execute test filters
+            # Execute test filters concurrently, then report in order
             print(f"\nExecuting {len(test_filters)} filter tests...\n")
 
-            for test in test_filters:
-                try:
-                    result = collection.query(
+            filter_results = await asyncio.gather(
+                *[
+                    collection.query(
                         query_texts=["test"],
                         n_results=1,
                         where=test["filter"]
                     )
-                    count = len(result["documents"][0]) if result["documents"] else 0
-                    status = "✓" if count > 0 else "✗"
-                    print(f"{status} {test['name']}: {count} results")
-                except Exception as e:
-                    print(f"✗ {test['name']}: ERROR - {str(e)[:60]}")
+                    for test in test_filters
+                ],
+                return_exceptions=True
+            )
+
+            for test, result in zip(test_filters, filter_results):
+                if isinstance(result, Exception):
+                    print(f"✗ {test['name']}: ERROR - {str(result)[:60]}")
+                    continue
+                count = len(result["documents"][0]) if result["documents"] else 0
+                status = "✓" if count > 0 else "✗"
+                print(f"{status} {test['name']}: {count} results")
 
         # Summary and recommendations
         print("\n" + "=" * 80)
@@ -163,4 +171,4 @@ Based on the diagnostic results:
         print("  chroma run --path /mnt/nvme-fast/databases/chromadb --port 8001")
 
 if __name__ == "__main__":
-    diagnose_chromadb()
+    asyncio.run(diagnose_chromadb())
@@ -14,7 +14,8 @@ import redis
 from tenacity import (
     retry,
     stop_after_attempt,
-    wait_exponential,
+    wait_random_exponential,
+    retry_all,
     retry_if_exception_type,
     before_sleep_log
 )
@@ -24,6 +25,12 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _breaker_not_open(retry_state) -> bool:
+    """Retry predicate: give up without sleeping once the client's circuit breaker is open"""
+    client = retry_state.args[0]
+    return client.breaker.current_state != pybreaker.STATE_OPEN
+
+
 class ResilientRedisClient:
     """Redis client with circuit breaker and retry logic"""
 
@@ -59,8 +66,11 @@ class ResilientRedisClient:
         return self._client
 
     @retry(
-        retry=retry_if_exception_type((redis.ConnectionError, redis.TimeoutError)),
-        wait=wait_exponential(multiplier=2, min=1, max=30),
+        retry=retry_all(
+            retry_if_exception_type((redis.ConnectionError, redis.TimeoutError)),
+            _breaker_not_open
+        ),
+        wait=wait_random_exponential(multiplier=1, max=30),
         stop=stop_after_attempt(3),
         before_sleep=before_sleep_log(logger, logging.WARNING)
     )
@@ -127,8 +137,11 @@ class ResilientChromaClient:
         return self._client
 
     @retry(
-        retry=retry_if_exception_type((ConnectionError, TimeoutError)),
-        wait=wait_exponential(multiplier=2, min=1, max=30),
+        retry=retry_all(
+            retry_if_exception_type((ConnectionError, TimeoutError)),
+            _breaker_not_open
+        ),
+        wait=wait_random_exponential(multiplier=1, max=30),
         stop=stop_after_attempt(3),
         before_sleep=before_sleep_log(logger, logging.WARNING)
     )
@@ -12,12 +12,15 @@ from typing import Dict, List, Optional
 import logging
 
 import torch
+from torch.utils.benchmark import Timer
 from sentence_transformers import SentenceTransformer
 import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+BENCHMARK_MIN_RUN_TIME = 0.5  # Seconds of timed runs per measurement (Timer picks the repeat count)
+
 
 class GPUVerifier:
     """Verify GPU acceleration for embedding models"""
@@ -74,6 +77,8 @@ class GPUVerifier:
 
         results = {"cpu": {}, "gpu": {}, "speedup": {}}
 
+        cpu_times = {}
+
         # CPU benchmark
         logger.info("  Benchmarking CPU...")
         model_cpu = SentenceTransformer(self.model_name, device='cpu')
@@ -84,13 +89,17 @@ class GPUVerifier:
             # Warmup
             _ = model_cpu.encode(sentences, show_progress_bar=False)
 
-            # Benchmark
-            start = time.time()
-            _ = model_cpu.encode(sentences, show_progress_bar=False)
-            cpu_time = time.time() - start
+            # Benchmark (median over as many runs as fit in BENCHMARK_MIN_RUN_TIME)
+            timer = Timer(
+                stmt="model.encode(sentences, show_progress_bar=False)",
+                globals={"model": model_cpu, "sentences": sentences},
+                num_threads=torch.get_num_threads()
+            )
+            cpu_time = timer.blocked_autorange(min_run_time=BENCHMARK_MIN_RUN_TIME).median
+            cpu_times[batch_size] = cpu_time
 
             results["cpu"][batch_size] = {
-                "time_seconds": round(cpu_time, 3),
+                "time_seconds": round(cpu_time, 4),
                 "throughput": round(batch_size / cpu_time, 1)
             }
 
@@ -106,18 +115,19 @@ class GPUVerifier:
                 _ = model_gpu.encode(sentences, convert_to_tensor=True, show_progress_bar=False)
                 torch.cuda.synchronize()
 
-                # Benchmark
-                start = time.time()
-                _ = model_gpu.encode(sentences, convert_to_tensor=True, show_progress_bar=False)
-                torch.cuda.synchronize()
-                gpu_time = time.time() - start
+                # Benchmark (Timer synchronizes CUDA around each measurement)
+                timer = Timer(
+                    stmt="model.encode(sentences, convert_to_tensor=True, show_progress_bar=False)",
+                    globals={"model": model_gpu, "sentences": sentences}
+                )
+                gpu_time = timer.blocked_autorange(min_run_time=BENCHMARK_MIN_RUN_TIME).median
 
                 results["gpu"][batch_size] = {
-                    "time_seconds": round(gpu_time, 3),
+                    "time_seconds": round(gpu_time, 4),
                     "throughput": round(batch_size / gpu_time, 1)
                 }
 
-                speedup = cpu_time / gpu_time
+                speedup = cpu_times[batch_size] / gpu_time
                 results["speedup"][batch_size] = round(speedup, 2)
 
                 logger.info(f"    Batch {batch_size}: {speedup:.2f}x faster on GPU")
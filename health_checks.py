@@ -12,6 +12,7 @@ import logging
 
 import chromadb
 import redis
+import redis.asyncio
 from sentence_transformers import SentenceTransformer
 import torch
 
@@ -26,12 +27,90 @@ class HealthChecker:
         self.start_time = time.time()
         self.is_initialized = False
 
+        # Async clients reused across checks, keyed by connection parameters
+        self._chroma_clients = {}
+        self._redis_clients = {}
+        self._clients_loop = None
+        self._clients_lock = asyncio.Lock()
+
+        # Embedding models loaded once and reused by every model check
+        self._embed_models = {}
+        self._embed_model_lock = asyncio.Lock()
+
+    async def _reset_clients_for_loop(self):
+        """Close and drop cached clients created on another event loop (they can't be used from this one)"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._clients_loop:
+            stale_redis_clients = list(self._redis_clients.values())
+            self._chroma_clients.clear()
+            self._redis_clients.clear()
+            self._clients_loop = loop
+            self._clients_lock = asyncio.Lock()
+            self._embed_model_lock = asyncio.Lock()  # Loaded models are kept; only the lock is per loop
+            await self._close_redis_clients(stale_redis_clients)
+
+    @staticmethod
+    async def _close_redis_clients(clients):
+        """Close Redis connection pools, logging (not raising) failures"""
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close Redis client: {e}")
+
+    async def _get_chroma_client(self, host: str, port: int):
+        """Shared async ChromaDB client for host:port (created on first use)"""
+        await self._reset_clients_for_loop()
+        client = self._chroma_clients.get((host, port))
+        if client is None:
+            async with self._clients_lock:
+                client = self._chroma_clients.get((host, port))
+                if client is None:
+                    client = await chromadb.AsyncHttpClient(host=host, port=port)
+                    self._chroma_clients[(host, port)] = client
+        return client
+
+    async def _get_redis_client(self, host: str, port: int, db: int) -> redis.asyncio.Redis:
+        """Shared async Redis client (with its own connection pool) for host:port/db"""
+        await self._reset_clients_for_loop()
+        client = self._redis_clients.get((host, port, db))
+        if client is None:
+            client = redis.asyncio.Redis(
+                host=host,
+                port=port,
+                db=db,
+                socket_timeout=2,
+                decode_responses=True
+            )
+            self._redis_clients[(host, port, db)] = client
+        return client
+
+    async def _get_embed_model(self, model_name: str) -> SentenceTransformer:
+        """Shared embedding model (loaded off the event loop on first use)"""
+        await self._reset_clients_for_loop()
+        model = self._embed_models.get(model_name)
+        if model is None:
+            async with self._embed_model_lock:
+                model = self._embed_models.get(model_name)
+                if model is None:
+                    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+                    model = await asyncio.to_thread(SentenceTransformer, model_name, device=device)
+                    self._embed_models[model_name] = model
+        return model
+
+    async def close(self):
+        """Close the cached Redis connection pools and drop all cached clients"""
+        clients = list(self._redis_clients.values())
+        self._redis_clients.clear()
+        self._chroma_clients.clear()
+        await self._close_redis_clients(clients)
+
     async def check_chromadb(self, host: str = "localhost", port: int = 8001) -> Dict:
         """Check ChromaDB health"""
         try:
-            client = chromadb.HttpClient(host=host, port=port)
-            heartbeat = await asyncio.to_thread(client.heartbeat)
-            collections = await asyncio.to_thread(client.list_collections)
+            client = await self._get_chroma_client(host, port)
+            heartbeat = await client.heartbeat()
+            collections = await client.list_collections()
 
             return {
                 "status": "healthy",
@@ -49,16 +128,10 @@ class HealthChecker:
     async def check_redis(self, host: str = "127.0.0.1", port: int = 6379, db: int = 2) -> Dict:
         """Check Redis health"""
         try:
-            client = redis.Redis(
-                host=host,
-                port=port,
-                db=db,
-                socket_timeout=2,
-                decode_responses=True
-            )
+            client = await self._get_redis_client(host, port, db)
 
-            ping = await asyncio.to_thread(client.ping)
-            info = await asyncio.to_thread(client.info, "server")
+            ping = await client.ping()
+            info = await client.info("server")
 
             return {
                 "status": "healthy",
@@ -78,7 +151,7 @@ class HealthChecker:
         try:
             # Check if model can be loaded and encode
             test_text = "Health check test"
-            model = SentenceTransformer(model_name)
+            model = await self._get_embed_model(model_name)
 
             device = str(model.device)
             is_gpu = "cuda" in device.lower()
@@ -1,34 +1,77 @@
 import os
 import json
+import hashlib
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import chromadb
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from sentence_transformers import SentenceTransformer
+import torch
 import logging
 import time
 
 # --- Configuration ---
 DATA_DIR = 'data'
 TARGETS_FILE = 'targets.json'
+INGEST_STATE_DB = '.ingest_state.db'  # Local record of ingested source files, their mtimes and chunk metadata
 CHROMA_HOST = 'localhost'
 CHROMA_PORT = '8001'
 COLLECTION_NAME = 'coding_knowledge'
 EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 150
+EMBED_BATCH_SIZE = 512  # Chunks per model forward pass
+ADD_BATCH_SIZE = 5000  # Chunks embedded and sent to ChromaDB per add() call (capped at the server's max batch size)
+ADD_WORKERS = 4  # Concurrent collection.add requests, overlapped with embedding of the next batch
+ALLOWED_EXTENSIONS = frozenset({".md", ".py", ".js", ".ts", ".json", ".txt", ".html", ".css"})
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # File reads are I/O bound (GIL released)
+READ_SLICE_SIZE = 1000  # Files submitted to the reader pool at a time
+QUEUE_SIZE = 1000  # Documents / chunks buffered between pipeline stages
+EMBED_WORKERS = 2  # Embedding threads sharing the model
 
 # --- Setup Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+
+_END_OF_STREAM = None  # Queued after the last item of a pipeline stage
+
+
+def _read_file(path):
+    """Reads one source file as a Document; returns None for files that can't be read."""
+    try:
+        text = Path(path).read_text(encoding='utf-8')
+    except Exception:
+        # Silently ignore errors on individual files that can't be read
+        return None
+    return Document(page_content=text, metadata={'source': path})
+
+
 class IngestionPipeline:
     def __init__(self):
         logging.info("Initializing Ingestion Pipeline...")
         self.targets_map = self._load_targets_map()
+        # Per-target metadata built once; each file only adds its own 'source_file'
+        self._target_metadata = {
+            key: {"technology": info["name"], "source_url": info["url"]}
+            for key, info in self.targets_map.items()
+        }
+        self._sources_db = self._open_sources_db()
+        self._state_lock = threading.Lock()  # Guards the state database and chunk bookkeeping across stages
+        self._stale_sources = set()
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=CHUNK_SIZE,
             chunk_overlap=CHUNK_OVERLAP
         )
-        self.embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        # Embed on GPU in half precision when available
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME, device=device)
+        if device == 'cuda':
+            self.embedding_model = self.embedding_model.half()
+        logging.info(f"Embedding model loaded on {device}.")
         try:
             self.chroma_client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
             self.collection = self.chroma_client.get_or_create_collection(name=COLLECTION_NAME)
@@ -69,35 +112,124 @@ class IngestionPipeline:
 
     def _get_metadata_for_file(self, file_path):
         """Generates metadata for a file based on its path and the targets map."""
-        try:
-            # e.g., 'data/repos/react_dev' -> 'react_dev'
-            path_parts = file_path.split(os.path.sep)
-            if len(path_parts) > 2:
-                key = path_parts[2]
-                target_info = self.targets_map.get(key)
-                if target_info:
-                    return {
-                        "technology": target_info["name"],
-                        "source_url": target_info["url"],
-                        "source_file": file_path
-                    }
-        except Exception:
-            pass
-        
+        # e.g., 'data/repos/react_dev/...' -> 'react_dev' (later separators are never split)
+        path_parts = file_path.split(os.path.sep, 3)
+        if len(path_parts) > 2:
+            target_metadata = self._target_metadata.get(path_parts[2])
+            if target_metadata:
+                return {**target_metadata, "source_file": file_path}
+
         # Fallback metadata
         return {"source_file": file_path}
 
+    def _open_sources_db(self):
+        """Opens the local ingest state database, creating it on first run."""
+        db = sqlite3.connect(INGEST_STATE_DB, check_same_thread=False)
+        # The file may also hold other tools' tables, so check for ours rather than the file
+        self._sources_db_is_new = db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'ingested_sources'"
+        ).fetchone() is None
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS ingested_sources "
+            "(path TEXT PRIMARY KEY, mtime REAL, sha1 TEXT)"
+        )
+        # Source file of every stored chunk, so a file's chunks can be deleted by id
+        # without a metadata scan in ChromaDB
+        db.execute("CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, source_file TEXT)")
+        db.execute("CREATE INDEX IF NOT EXISTS chunks_source_file ON chunks (source_file)")
+        # Databases from earlier versions also indexed a technology column nothing read
+        db.execute("DROP INDEX IF EXISTS chunks_technology")
+        db.commit()
+        return db
+
+    def _record_chunks(self, ids, metadatas):
+        """Stages the source file of stored chunks in the local chunks table (committed with the sources)."""
+        self._sources_db.executemany(
+            "INSERT OR REPLACE INTO chunks (id, source_file) VALUES (?, ?)",
+            [(chunk_id, meta.get('source_file')) for chunk_id, meta in zip(ids, metadatas)]
+        )
+
+    def _delete_source_chunks(self, source):
+        """Deletes a source file's chunks from ChromaDB and the local chunks table."""
+        with self._state_lock:
+            chunk_ids = [row[0] for row in self._sources_db.execute("SELECT id FROM chunks WHERE source_file = ?", (source,))]
+        if chunk_ids:
+            self.collection.delete(ids=chunk_ids)
+            with self._state_lock:
+                self._sources_db.execute("DELETE FROM chunks WHERE source_file = ?", (source,))
+                self._sources_db.commit()
+        else:
+            # Ingested before chunks were tracked locally
+            self.collection.delete(where={"source_file": source})
+
+    def _record_sources(self, paths):
+        """Records fully ingested source files with their current mtime."""
+        rows = []
+        for path in paths:
+            try:
+                rows.append((path, os.path.getmtime(path), None))
+            except OSError:
+                continue
+        self._sources_db.executemany("INSERT OR REPLACE INTO ingested_sources VALUES (?, ?, ?)", rows)
+        self._sources_db.commit()
+
     def _get_existing_sources(self):
-        """Gets a set of all 'source_file' paths already in the database."""
+        """Gets a set of 'source_file' paths already ingested and unchanged since."""
+        self._stale_sources = set()
+        if self._sources_db_is_new or not self._sources_db_matches_collection():
+            self._sources_db_is_new = False
+            return self._get_existing_sources_from_chroma()
+
+        sources = set()
+        for path, mtime in self._sources_db.execute("SELECT path, mtime FROM ingested_sources"):
+            try:
+                current_mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if current_mtime == mtime:
+                sources.add(path)
+            else:
+                self._stale_sources.add(path)
+        logging.info(f"Found {len(sources)} existing sources in '{INGEST_STATE_DB}' ({len(self._stale_sources)} modified since ingest).")
+        return sources
+
+    def _sources_db_matches_collection(self):
+        """
+        Checks that the local state still describes the collection.
+
+        The collection can be dropped or rewritten behind our back (e.g. batched_ingest.py
+        --recreate-collection), so an empty collection or a chunk count that differs from
+        the local chunks table means the local state has to be rebuilt from ChromaDB.
+        """
         try:
-            existing_metadata = self.collection.get(include=["metadatas"])
-            sources = set(meta['source_file'] for meta in existing_metadata['metadatas'] if 'source_file' in meta)
-            logging.info(f"Found {len(sources)} existing sources in the database.")
-            return sources
+            collection_count = self.collection.count()
+        except Exception as e:
+            logging.warning(f"Could not count the collection, rescanning it. Error: {e}")
+            return False
+        local_count = self._sources_db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        if collection_count == 0 or collection_count != local_count:
+            logging.info(f"Collection holds {collection_count} chunks, local state tracks {local_count}; rescanning the collection.")
+            return False
+        return True
+
+    def _get_existing_sources_from_chroma(self):
+        """Gets all 'source_file' paths from the collection (full scan) and rebuilds the local state database from it."""
+        try:
+            existing = self.collection.get(include=["metadatas"])
         except Exception as e:
             logging.warning(f"Could not retrieve existing sources, will perform a full ingest. Error: {e}")
             return set()
 
+        metadatas = [meta or {} for meta in existing['metadatas']]
+        sources = set(meta['source_file'] for meta in metadatas if 'source_file' in meta)
+        logging.info(f"Found {len(sources)} existing sources in the database.")
+        with self._state_lock:
+            self._sources_db.execute("DELETE FROM ingested_sources")
+            self._sources_db.execute("DELETE FROM chunks")
+            self._record_chunks(existing['ids'], metadatas)
+            self._record_sources(sources)
+        return sources
+
     def run(self):
         """
         Executes the full ingestion pipeline.
@@ -107,85 +239,186 @@ class IngestionPipeline:
         # Get a set of already processed source files
         existing_sources = self._get_existing_sources()
 
-        # 1. Load all documents from the data directory, only picking allowed file types
+        # 1. Find allowed file types in one walk of the data directory (hidden paths skipped),
+        #    then load only the files that have not been ingested yet
         logging.info(f"Scanning '{DATA_DIR}' for new documents...")
-        
-        ALLOWED_EXTENSIONS = [".md", ".py", ".js", ".ts", ".json", ".txt", ".html", ".css"]
-        all_docs = []
 
-        for ext in ALLOWED_EXTENSIONS:
-            glob_pattern = f"**/*{ext}"
-            try:
-                loader = DirectoryLoader(
-                    DATA_DIR,
-                    glob=glob_pattern,
-                    loader_cls=TextLoader,
-                    recursive=True,
-                    show_progress=True,
-                    use_multithreading=True,
-                    # Silently ignore errors on individual files that can't be read
-                    silent_errors=True
-                    # Note: file_filter parameter not supported in this langchain version
-                    # tokenizer.json files will be filtered manually if needed
-                )
-                loaded_docs = loader.load()
-                all_docs.extend(loaded_docs)
-                logging.info(f"Found {len(loaded_docs)} documents with extension {ext}")
-            except Exception as e:
-                logging.warning(f"Error loading files with extension {ext}: {e}")
-        
-        # Filter out documents that have already been ingested
-        documents = [doc for doc in all_docs if doc.metadata['source'] not in existing_sources]
-        logging.info(f"Found {len(all_docs)} total files. After filtering, there are {len(documents)} new documents to ingest.")
-
-        logging.info(f"Loaded {len(documents)} documents.")
+        all_paths = [
+            str(path) for path in Path(DATA_DIR).rglob('*')
+            if path.suffix in ALLOWED_EXTENSIONS
+            and not any(part.startswith('.') for part in path.parts)
+            and path.is_file()
+        ]
+        new_paths = [path for path in all_paths if path not in existing_sources]
+        logging.info(f"Found {len(all_paths)} total files. After filtering, there are {len(new_paths)} new documents to ingest.")
 
-        if not documents:
+        if not new_paths:
             logging.warning("No documents found to ingest.")
             return
 
-        # 2. Add metadata to each document
-        logging.info("Attaching metadata to documents...")
-        for doc in documents:
-            doc.metadata = self._get_metadata_for_file(doc.metadata['source'])
+        # 2-4. Load, split, embed and store concurrently. Stages are connected by bounded
+        #      queues, so only a window of documents and chunks is held in memory at once.
+        logging.info("Loading, splitting and embedding documents. This may take a while...")
+        doc_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        chunk_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._pending_chunks = {}
+        self._errors = []
+        self._counts = {'documents': 0, 'chunks': 0, 'batches': 0, 'added': 0}
+        self._add_batch_size = min(ADD_BATCH_SIZE, self.chroma_client.get_max_batch_size())
+        # Bounds embedded batches waiting for (or in) an add request
+        self._add_slots = threading.BoundedSemaphore(ADD_WORKERS * 2)
 
-        # 3. Split documents into chunks
-        logging.info("Splitting documents into chunks...")
-        chunks = self.text_splitter.split_documents(documents)
-        logging.info(f"Created {len(chunks)} chunks.")
+        with ThreadPoolExecutor(max_workers=ADD_WORKERS) as add_executor:
+            stages = [
+                threading.Thread(target=self._load_stage, args=(new_paths, doc_queue)),
+                threading.Thread(target=self._split_stage, args=(doc_queue, chunk_queue)),
+            ]
+            stages += [
+                threading.Thread(target=self._embed_stage, args=(chunk_queue, add_executor))
+                for _ in range(EMBED_WORKERS)
+            ]
+            for stage in stages:
+                stage.start()
+            for stage in stages:
+                stage.join()
 
-        if not chunks:
+        if self._errors:
+            raise self._errors[0]
+
+        logging.info(f"Loaded {self._counts['documents']} documents and created {self._counts['chunks']} chunks.")
+        if not self._counts['chunks']:
             logging.warning("No chunks created from documents.")
             return
 
-        # 4. Embed and store in ChromaDB
-        logging.info("Embedding chunks and storing in ChromaDB. This may take a while...")
-        batch_size = 100  # Process in batches to manage memory
-        total_chunks = len(chunks)
-        
-        for i in range(0, total_chunks, batch_size):
-            batch_chunks = chunks[i:i+batch_size]
-            
-            ids = [f"{chunk.metadata['source_file']}-{i+j}" for j, chunk in enumerate(batch_chunks)]
-            documents_to_embed = [chunk.page_content for chunk in batch_chunks]
-            metadatas = [chunk.metadata for chunk in batch_chunks]
-
-            start_time = time.time()
-            embeddings = self.embedding_model.encode(documents_to_embed, show_progress_bar=False).tolist()
-            end_time = time.time()
-            
-            logging.info(f"Batch {i//batch_size + 1}/{(total_chunks-1)//batch_size + 1}: Embedded {len(batch_chunks)} chunks in {end_time - start_time:.2f} seconds.")
+        logging.info("--- Ingestion Process Finished ---")
+        logging.info(f"Successfully added {self._counts['added']} chunks to the '{COLLECTION_NAME}' collection.")
+        logging.info(f"Database is served at: {CHROMA_HOST}:{CHROMA_PORT}")
+
+    def _load_stage(self, paths, doc_queue):
+        """Reads files on a thread pool and queues them as Documents."""
+        try:
+            with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+                for start in range(0, len(paths), READ_SLICE_SIZE):
+                    for doc in executor.map(_read_file, paths[start:start + READ_SLICE_SIZE]):
+                        if doc is not None:
+                            doc_queue.put(doc)
+                            self._counts['documents'] += 1
+        except Exception as e:
+            logging.error(f"Error loading documents: {e}")
+            self._errors.append(e)
+        finally:
+            doc_queue.put(_END_OF_STREAM)
+
+    def _split_stage(self, doc_queue, chunk_queue):
+        """Attaches metadata to each Document, splits it and queues its chunks with their ids."""
+        try:
+            while True:
+                doc = doc_queue.get()
+                if doc is _END_OF_STREAM:
+                    break
+                if self._errors:
+                    continue  # Keep draining so the loader is never blocked
+
+                source = doc.metadata['source']
+                doc.metadata = self._get_metadata_for_file(source)
+                chunks = self.text_splitter.split_documents([doc])
+
+                # Drop the old chunks of a file modified since it was ingested
+                if source in self._stale_sources:
+                    self._delete_source_chunks(source)
+                    logging.info(f"Removed outdated chunks for modified file: {source}")
+
+                if not chunks:
+                    # Recorded too, so files without content aren't re-read on every run
+                    with self._state_lock:
+                        self._record_sources([source])
+                    continue
 
+                with self._state_lock:
+                    self._pending_chunks[source] = len(chunks)
+                self._counts['chunks'] += len(chunks)
+                source_hash = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+                for k, chunk in enumerate(chunks):
+                    chunk_queue.put((f"{source_hash}-{k}", chunk))
+        except Exception as e:
+            logging.error(f"Error splitting documents: {e}")
+            self._errors.append(e)
+            while doc_queue.get() is not _END_OF_STREAM:
+                pass
+        finally:
+            for _ in range(EMBED_WORKERS):
+                chunk_queue.put(_END_OF_STREAM)
+
+    def _embed_stage(self, chunk_queue, add_executor):
+        """Collects queued chunks into batches, embeds each batch and hands it to the add pool."""
+        batch = []
+        while True:
+            item = chunk_queue.get()
+            if item is not _END_OF_STREAM:
+                batch.append(item)
+            if batch and (item is _END_OF_STREAM or len(batch) == self._add_batch_size):
+                if not self._errors:
+                    try:
+                        self._embed_batch(batch, add_executor)
+                    except Exception as e:
+                        logging.error(f"Error embedding chunks: {e}")
+                        self._errors.append(e)
+                batch = []
+            if item is _END_OF_STREAM:
+                return
+
+    def _embed_batch(self, batch, add_executor):
+        """Embeds one batch of (id, chunk) pairs and submits it to ChromaDB without waiting."""
+        ids = [chunk_id for chunk_id, _ in batch]
+        documents_to_embed = [chunk.page_content for _, chunk in batch]
+        metadatas = [chunk.metadata for _, chunk in batch]
+
+        start_time = time.time()
+        embeddings = self.embedding_model.encode(
+            documents_to_embed,
+            batch_size=EMBED_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        end_time = time.time()
+        logging.info(f"Embedded {len(batch)} chunks in {end_time - start_time:.2f} seconds.")
+
+        self._add_slots.acquire()
+        add_executor.submit(self._store_batch, ids, documents_to_embed, metadatas, embeddings)
+
+    def _store_batch(self, ids, documents, metadatas, embeddings):
+        """Adds one embedded batch to ChromaDB and records files whose chunks are now all stored."""
+        try:
+            if self._errors:
+                return
             self.collection.add(
                 embeddings=embeddings,
-                documents=documents_to_embed,
+                documents=documents,
                 metadatas=metadatas,
                 ids=ids
             )
-        
-        logging.info("--- Ingestion Process Finished ---")
-        logging.info(f"Successfully added {total_chunks} chunks to the '{COLLECTION_NAME}' collection.")
-        logging.info(f"Database is stored at: '{DB_PATH}'")
+
+            with self._state_lock:
+                completed_sources = []
+                for meta in metadatas:
+                    source = meta['source_file']
+                    self._pending_chunks[source] -= 1
+                    if not self._pending_chunks[source]:
+                        del self._pending_chunks[source]
+                        completed_sources.append(source)
+                self._record_chunks(ids, metadatas)
+                self._record_sources(completed_sources)
+                self._counts['batches'] += 1
+                self._counts['added'] += len(ids)
+                batch_number = self._counts['batches']
+
+            logging.info(f"Batch {batch_number}: Stored {len(ids)} chunks.")
+        except Exception as e:
+            logging.error(f"Error storing chunks: {e}")
+            self._errors.append(e)
+        finally:
+            self._add_slots.release()
 
 
 if __name__ == "__main__":
@@ -10,8 +10,10 @@ Features:
 Usage: fastmcp run rag_server.py
 """
 
+import asyncio
 import os
 import sys
+import threading
 from typing import List, Dict, Any, Optional
 from fastmcp import FastMCP, Context
 import chromadb
@@ -77,7 +79,10 @@ def get_cache_manager():
             cache_manager = RAGCacheManager(
                 redis_host=os.getenv("REDIS_HOST", "localhost"),
                 redis_port=int(os.getenv("REDIS_PORT", "6379")),
-                redis_db=int(os.getenv("REDIS_DB", "2"))
+                redis_db=int(os.getenv("REDIS_DB", "2")),
+                enable_admission_filter=True,
+                shared_memory_name=os.getenv("RAG_SHM_CACHE"),  # e.g. "rag_embeddings" for multi-worker hosts
+                embedding_precision=os.getenv("RAG_EMBEDDING_PRECISION", "float32")  # or bfloat16 / int8
             )
             logger.info("Cache manager initialized (3-level caching enabled)")
         except Exception as e:
@@ -155,10 +160,14 @@ async def query_knowledge_base(
 
         logger.info(f"Query: '{query}' | Filter: {technology_filter} | Top K: {top_k}")
 
-        # Check response cache (Level 3)
+        # Check response cache (Level 3) and embedding cache (Level 1) concurrently
         cache = get_cache_manager()
+        cached_embedding = None
         if cache:
-            cached_response = cache.get_cached_response(query, technology_filter, top_k)
+            cached_response, cached_embedding = await asyncio.gather(
+                cache.get_cached_response_async(query, technology_filter, top_k),
+                cache.get_cached_embedding_async(query)
+            )
             if cached_response:
                 cached_response["cache_hit"] = "response_cache"
                 logger.info(f"✓ Response cache HIT - returning cached result")
@@ -171,13 +180,12 @@ async def query_knowledge_base(
         # Check embedding cache (Level 1)
         model = get_embedding_model()
         if cache:
-            cached_embedding = cache.get_cached_embedding(query)
             if cached_embedding is not None:
                 query_embedding = cached_embedding
                 logger.debug(f"✓ Embedding cache HIT")
             else:
                 query_embedding = model.encode(query)
-                cache.cache_embedding(query, query_embedding)
+                await cache.cache_embedding_async(query, query_embedding)
                 logger.debug(f"✗ Embedding cache MISS - cached new embedding")
         else:
             query_embedding = model.encode(query)
@@ -192,7 +200,7 @@ async def query_knowledge_base(
 
         # Check retrieval cache (Level 2)
         if cache:
-            cached_retrieval = cache.get_cached_retrieval(query_embedding, technology_filter)
+            cached_retrieval = await cache.get_cached_retrieval_async(query_embedding, technology_filter)
             if cached_retrieval:
                 results = cached_retrieval
                 logger.debug(f"✓ Retrieval cache HIT")
@@ -204,7 +212,7 @@ async def query_knowledge_base(
                     where=where_filter,
                     include=["documents", "metadatas", "distances"]
                 )
-                cache.cache_retrieval(query_embedding, results, technology_filter)
+                await cache.cache_retrieval_async(query_embedding, results, technology_filter)
                 logger.debug(f"✗ Retrieval cache MISS - cached new results")
         else:
             # Perform vector search
@@ -240,7 +248,7 @@ async def query_knowledge_base(
 
         # Cache complete response
         if cache:
-            cache.cache_response(query, formatted_results, technology_filter, top_k)
+            await cache.cache_response_async(query, formatted_results, technology_filter, top_k)
 
         logger.info(f"Found {len(results['documents'][0])} results")
         return formatted_results
@@ -629,16 +637,15 @@ except ImportError as e:
 
 # Week 3 enhancements - Hybrid search and query analytics
 try:
-    from bm25_indexer import BM25Indexer
+    from bm25_indexer import open_index_shared
     from rrf_fusion import ReciprocalRankFusion
     from query_analytics import QueryAnalytics
     WEEK3_FEATURES = True
 
     # Initialize hybrid search components
     logger.info("Loading BM25 index for hybrid search...")
-    bm25_indexer = BM25Indexer()
     try:
-        bm25_indexer.load_index()
+        bm25_indexer = open_index_shared()
         logger.info(f"✓ BM25 index loaded ({len(bm25_indexer.documents)} documents)")
     except FileNotFoundError:
         logger.warning("BM25 index not found. Run: python bm25_indexer.py to build index")
@@ -922,8 +929,20 @@ async def query_knowledge_base_with_tracking(*args, **kwargs):
     return await original_query_kb(*args, **kwargs)
 
 
+def warm_cache_on_startup():
+    """Re-run hot tracked queries so their cache entries are in place after a restart"""
+    # @mcp.tool() may wrap the function in a tool object; call the function itself
+    query_fn = getattr(original_query_kb, 'fn', original_query_kb)
+    cache_warmer.warm_candidates(
+        lambda query, technology_filter: asyncio.run(query_fn(query=query, technology_filter=technology_filter))
+    )
+
+
 # Run server
 if __name__ == "__main__":
     logger.info("Starting RAG Knowledge Base MCP Server...")
     logger.info(f"Production features: {'enabled' if PRODUCTION_FEATURES else 'disabled'}")
+    if PRODUCTION_FEATURES and CACHING_ENABLED and os.getenv("RAG_WARM_CACHE_ON_STARTUP", "1") == "1":
+        # Paced by warm_candidates; runs in the background so the server starts immediately
+        threading.Thread(target=warm_cache_on_startup, name="cache-warm", daemon=True).start()
     mcp.run(transport="stdio")
@@ -0,0 +1,175 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+import logging
+from unittest import mock
+
+import numpy as np
+
+# Add the RAG directory to the Python path to allow importing the pipeline
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+try:
+    import ingest
+except ImportError as e:
+    print(f"Error: Could not import ingest ({e}). Make sure you are in the RAG directory.")
+    sys.exit(1)
+
+# --- In-memory stand-ins for the ChromaDB server and the embedding model ---
+class MemoryCollection:
+    """Just enough of a ChromaDB collection for the ingestion pipeline."""
+    def __init__(self):
+        self.records = {}  # id -> metadata
+
+    def count(self):
+        return len(self.records)
+
+    def get(self, include=None):
+        return {'ids': list(self.records), 'metadatas': list(self.records.values())}
+
+    def add(self, embeddings, documents, metadatas, ids):
+        for chunk_id, metadata in zip(ids, metadatas):
+            self.records.setdefault(chunk_id, metadata)
+
+    def delete(self, ids=None, where=None):
+        if where is not None:
+            ids = [i for i, m in self.records.items() if m.get('source_file') == where['source_file']]
+        for chunk_id in ids:
+            self.records.pop(chunk_id, None)
+
+    def sources(self):
+        return {m['source_file'] for m in self.records.values()}
+
+
+class MemoryClient:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get_or_create_collection(self, name):
+        return self.collection
+
+    def get_max_batch_size(self):
+        return 100
+
+
+class StubEncoder:
+    """Fixed-size vectors; the state bookkeeping doesn't depend on their values."""
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def encode(self, texts, **kwargs):
+        return np.ones((len(texts), 8), dtype=np.float32)
+
+# --- Test Suite ---
+class TestIngestState(unittest.TestCase):
+    """
+    Checks which files ingest.py re-reads across runs, as recorded in the local state database.
+    """
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.workdir = tempfile.mkdtemp()
+        os.chdir(self.workdir)  # ingest.py resolves data/, targets.json and the state DB from here
+
+        with open(ingest.TARGETS_FILE, 'w') as f:
+            json.dump([{"name": "React Docs", "url": "https://react.dev", "type": "git",
+                        "destination": "repos/react_docs"}], f)
+        self.data_dir = os.path.join(ingest.DATA_DIR, 'repos', 'react_docs')
+        os.makedirs(self.data_dir)
+        self.hooks = self._write('hooks.md', "useState lets a component remember a value. " * 60)
+        self.effects = self._write('effects.md', "useEffect synchronizes a component with a system. " * 60)
+
+        self.collection = MemoryCollection()
+        self.reads = []
+        patches = [
+            mock.patch.object(ingest.chromadb, 'HttpClient', lambda **kwargs: MemoryClient(self.collection)),
+            mock.patch.object(ingest, 'SentenceTransformer', StubEncoder),
+            mock.patch.object(ingest, '_read_file', side_effect=self._record_read(ingest._read_file)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.workdir)
+
+    def _write(self, name, text, mtime=None):
+        path = os.path.join(self.data_dir, name)
+        with open(path, 'w') as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def _record_read(self, read_file):
+        def wrapper(path):
+            self.reads.append(path)
+            return read_file(path)
+        return wrapper
+
+    def _run(self):
+        """Runs the pipeline once and returns the files it read."""
+        self.reads = []
+        pipeline = ingest.IngestionPipeline()
+        try:
+            pipeline.run()
+        finally:
+            pipeline._sources_db.close()
+        return sorted(self.reads)
+
+    def _chunk_ids(self, path):
+        return {i for i, m in self.collection.records.items() if m['source_file'] == path}
+
+    def test_01_unchanged_files_are_skipped(self):
+        """A second run over unchanged files reads nothing."""
+        self.assertEqual(self._run(), sorted([self.hooks, self.effects]))
+        stored = dict(self.collection.records)
+
+        self.assertEqual(self._run(), [])
+        self.assertEqual(self.collection.records, stored)
+
+    def test_02_modified_file_replaces_its_chunks(self):
+        """A modified file is re-read and its old chunks replaced; others are skipped."""
+        self._run()
+        old_ids = self._chunk_ids(self.hooks)
+        effects_ids = self._chunk_ids(self.effects)
+
+        self._write('hooks.md', "Hooks are functions. ", mtime=os.path.getmtime(self.hooks) + 10)
+        self.assertEqual(self._run(), [self.hooks])
+        self.assertEqual(len(self._chunk_ids(self.hooks)), 1)
+        self.assertTrue(old_ids - self._chunk_ids(self.hooks), "Outdated chunks were not deleted")
+        self.assertEqual(self._chunk_ids(self.effects), effects_ids)
+
+    def test_03_emptied_file_drops_its_chunks(self):
+        """A modified file that now yields no chunks loses its old ones and isn't re-read after."""
+        self._run()
+        self._write('hooks.md', "", mtime=os.path.getmtime(self.hooks) + 10)
+
+        self.assertEqual(self._run(), [self.hooks])
+        self.assertEqual(self._chunk_ids(self.hooks), set())
+        self.assertEqual(self._run(), [])
+
+    def test_04_recreated_collection_is_reingested(self):
+        """An emptied or recreated collection re-ingests every file despite the local state."""
+        self._run()
+        self.collection.records.clear()
+
+        self.assertEqual(self._run(), sorted([self.hooks, self.effects]))
+        self.assertEqual(self.collection.sources(), {self.hooks, self.effects})
+        self.assertEqual(self._run(), [])
+
+    def test_05_collection_changed_elsewhere_rebuilds_state(self):
+        """Chunks removed behind the pipeline's back are noticed and their files re-ingested."""
+        self._run()
+        self.collection.delete(where={'source_file': self.effects})
+
+        self.assertEqual(self._run(), [self.effects])
+        self.assertEqual(self.collection.sources(), {self.hooks, self.effects})
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    unittest.main(verbosity=2)
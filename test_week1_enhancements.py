@@ -9,6 +9,7 @@ Tests:
 4. Batch query functionality
 5. Cache statistics
 6. Enhanced tool descriptions
+7. Cache entry encoding (framing, compression, embedding precisions, legacy entries)
 
 Usage: .venv/bin/python test_week1_enhancements.py
 """
@@ -297,6 +298,85 @@ async def test_tool_descriptions():
         print_result("Enhanced tool descriptions", False, str(e))
         return False
 
+async def test_cache_entry_encoding():
+    """Test 7: Cache entries round-trip, and entries from earlier versions still decode"""
+    print_header("TEST 7: Cache Entry Encoding")
+
+    try:
+        import pickle
+        from unittest import mock
+        import numpy as np
+        import caching_layer
+        from caching_layer import RAGCacheManager
+
+        # Encoding needs no Redis; the manager just runs with caching disabled if it's down
+        cache = RAGCacheManager(redis_host='localhost', redis_port=6379, redis_db=2, enable_adaptive_ttl=False)
+        embedding = np.random.default_rng(0).standard_normal(384).astype(np.float32)
+        small = {"ids": ["a"], "scores": [0.5]}
+        large = {"documents": ["useState lets a component remember a value. " * 40]}
+
+        def round_trip(data):
+            return cache._deserialize(cache._decode_entry(cache._encode_entry(cache._serialize(data))))
+
+        def embedding_round_trip():
+            entry = cache._encode_entry(cache._serialize_embedding(embedding))
+            return entry, cache._deserialize_embedding(cache._decode_entry(entry))
+
+        checks = []
+
+        # Uncompressed payloads and zstd frames are stored without a prefix byte
+        entry = cache._encode_entry(cache._serialize(small))
+        checks.append(("Small entry stored unprefixed", entry == cache._serialize(small) and round_trip(small) == small))
+        entry = cache._encode_entry(cache._serialize(large))
+        checks.append(("Large entry stored as zstd frame",
+                       entry[:4] == caching_layer.ZSTD_MAGIC and round_trip(large) == large))
+
+        # LZ4 blocks keep a one-byte codec prefix
+        with mock.patch.object(caching_layer, 'HAS_ZSTD', False):
+            entry = cache._encode_entry(cache._serialize(large))
+            checks.append(("LZ4 entry is codec-prefixed",
+                           entry[0] == caching_layer.CODEC_LZ4_BLOCK and round_trip(large) == large))
+
+        # Embedding frames at each storage precision
+        entry, decoded = embedding_round_trip()
+        checks.append(("float32 embedding exact and uncompressed",
+                       entry[0] == caching_layer.EMBED_MAGIC and np.array_equal(decoded, embedding)))
+        for precision, size, atol in (('bfloat16', 2, 0.02), ('int8', 1, 0.03)):
+            cache.embedding_precision = precision
+            entry, decoded = embedding_round_trip()
+            checks.append((f"{precision} embedding within tolerance",
+                           len(cache._decode_entry(entry)) < 384 * size + 16
+                           and decoded.dtype == np.float32 and np.allclose(decoded, embedding, atol=atol)))
+        cache.embedding_precision = 'float32'
+
+        # Entries written before this format: flag byte (0 raw, 1 LZ4 frame) + payload,
+        # numpy arrays as a '_numpy' map of Python floats
+        legacy = caching_layer.msgpack.packb(
+            {'_numpy': True, 'data': embedding.tolist(), 'dtype': 'float32', 'shape': [384]}, use_bin_type=True
+        )
+        for flag, payload in ((0, legacy), (1, caching_layer.lz4.frame.compress(legacy))):
+            decoded = cache._deserialize_embedding(cache._decode_entry(bytes([flag]) + payload))
+            checks.append((f"Legacy msgpack entry (flag {flag}) decodes", np.array_equal(decoded, embedding)))
+
+        # Installs without a MessagePack backend wrote (and still read) pickles
+        with mock.patch.multiple(caching_layer, HAS_MSGSPEC=False, HAS_MSGPACK=False, pickle=pickle, create=True):
+            pickled = pickle.dumps(embedding)
+            for flag, payload in ((0, pickled), (1, caching_layer.lz4.frame.compress(pickled))):
+                decoded = cache._deserialize_embedding(cache._decode_entry(bytes([flag]) + payload))
+                checks.append((f"Legacy pickle entry (flag {flag}) decodes", np.array_equal(decoded, embedding)))
+            checks.append(("Pickle entry round-trip", round_trip(large) == large))
+
+        for name, passed in checks:
+            print_result(name, passed)
+
+        return all(passed for _, passed in checks)
+
+    except Exception as e:
+        print_result("Cache entry encoding", False, str(e))
+        import traceback
+        traceback.print_exc()
+        return False
+
 async def main():
     """Run all tests"""
     print("\n" + "=" * 80)
@@ -317,6 +397,7 @@ async def main():
     results.append(("Batch Query", await test_batch_query()))
     results.append(("Cache Statistics", await test_cache_stats_tool()))
     results.append(("Tool Descriptions", await test_tool_descriptions()))
+    results.append(("Cache Entry Encoding", await test_cache_entry_encoding()))
 
     # Summary
     print_header("TEST SUMMARY")
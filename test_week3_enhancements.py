@@ -19,6 +19,7 @@ class Week3TestSuite:
     def __init__(self):
         self.results = {
             "bm25_indexer": {},
+            "bm25_parity": {},
             "rrf_fusion": {},
             "query_analytics": {},
             "integration": {}
@@ -84,6 +85,106 @@ class Week3TestSuite:
                 "error": str(e)
             }
 
+    def test_bm25_parity(self) -> Dict[str, Any]:
+        """Test BM25 rankings match rank_bm25.BM25Okapi (the original implementation)"""
+        logger.info("=" * 60)
+        logger.info("Testing BM25 Parity with rank_bm25")
+        logger.info("=" * 60)
+
+        try:
+            import tempfile
+            import numpy as np
+            from rank_bm25 import BM25Okapi
+            import bm25_indexer
+            from bm25_indexer import BM25Indexer
+
+            # Synthetic corpus with common terms (negative idf) and rare ones
+            rng = np.random.default_rng(0)
+            words = [f"term{i:03d}" for i in range(200)]
+            technologies = ["React Docs", "Python Docs", "FastAPI Docs"]
+            documents, metadatas = [], []
+            for i in range(600):
+                length = int(rng.integers(5, 80))
+                picks = rng.zipf(1.3, size=length) % len(words)
+                documents.append(" ".join(words[p] for p in picks) + " the of to")
+                metadatas.append({"technology": technologies[i % 3], "source_url": "", "source_file": f"doc{i}.md"})
+            ids = [f"id{i}" for i in range(len(documents))]
+
+            class _Collection:
+                def count(self):
+                    return len(documents)
+
+                def get(self, limit, offset, include):
+                    return {"ids": ids[offset:offset + limit], "documents": documents[offset:offset + limit],
+                            "metadatas": metadatas[offset:offset + limit]}
+
+            class _Client:
+                def get_collection(self, name):
+                    return _Collection()
+
+            # Reference: the pre-rewrite search (BM25Okapi scores, filter, stable sort)
+            tokenize = BM25Indexer().tokenize
+            reference = BM25Okapi([tokenize(doc) for doc in documents])
+
+            def expected(query, top_k, technology_filter):
+                scores = reference.get_scores(tokenize(query))
+                ranked = [
+                    (ids[i], score) for i, score in enumerate(scores)
+                    if score > 0 and (not technology_filter or metadatas[i]["technology"] == technology_filter)
+                ]
+                ranked.sort(key=lambda r: r[1], reverse=True)
+                return ranked[:top_k]
+
+            indexer = BM25Indexer()
+            indexer._chroma_client = _Client()
+            indexer.build_index()
+            with tempfile.TemporaryDirectory() as index_dir:
+                indexer.save_index(index_dir)
+                loaded = BM25Indexer()
+                loaded.load_index(index_dir)
+
+                queries = [
+                    ("term001 term002", 5, None),
+                    ("term050 term150 term199 the", 10, None),
+                    ("term003 term003 term120", 5, "Python Docs"),
+                    ("term007 of", 20, "React Docs"),
+                    ("unknownword term010", 3, None),
+                ]
+                scorers = [True, False] if bm25_indexer.HAS_NUMBA else [False]
+                mismatches = []
+                for has_numba in scorers:
+                    bm25_indexer.HAS_NUMBA = has_numba
+                    for index in (indexer, loaded):
+                        index._rank_cached.cache_clear()
+                        for query, top_k, tech in queries:
+                            want = expected(query, top_k, tech)
+                            got = [(r["doc_id"], r["bm25_score"]) for r in index.search(query, top_k, tech)]
+                            same = [doc_id for doc_id, _ in got] == [doc_id for doc_id, _ in want] and np.allclose(
+                                [score for _, score in got], [score for _, score in want], rtol=1e-4)
+                            if not same:
+                                mismatches.append((query, tech, has_numba))
+                bm25_indexer.HAS_NUMBA = scorers[0]
+
+            logger.info(f"    ✓ Compared {len(queries)} queries x {len(scorers)} scorer(s) x built/loaded index")
+            if mismatches:
+                logger.error(f"    ✗ Ranking mismatches: {mismatches}")
+                self.all_passed = False
+
+            return {
+                "status": "FAILED" if mismatches else "PASSED",
+                "queries_compared": len(queries),
+                "scorers": ["numba" if s else "numpy" for s in scorers],
+                "mismatches": mismatches
+            }
+
+        except Exception as e:
+            logger.error(f"  ✗ BM25 parity test failed: {e}", exc_info=True)
+            self.all_passed = False
+            return {
+                "status": "FAILED",
+                "error": str(e)
+            }
+
     def test_rrf_fusion(self) -> Dict[str, Any]:
         """Test RRF fusion algorithm"""
         logger.info("=" * 60)
@@ -301,6 +402,7 @@ class Week3TestSuite:
 
         # Run all tests
         self.results["bm25_indexer"] = self.test_bm25_indexer()
+        self.results["bm25_parity"] = self.test_bm25_parity()
         self.results["rrf_fusion"] = self.test_rrf_fusion()
         self.results["query_analytics"] = self.test_query_analytics()
         self.results["integration"] = self.test_integration()